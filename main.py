@@ -7,11 +7,18 @@ import ssl
 import sys
 import time
 import os
-import queue
 import struct
 import requests
+import requests.adapters
 import socket
 import concurrent.futures
+import asyncio
+import ipaddress
+import collections
+import codecs
+import errno
+import math
+import random
 import urllib3
 import paramiko
 import io
@@ -23,9 +30,16 @@ import subprocess
 import tempfile
 import shutil
 import zipfile
+import atexit
+import http.server
 from functools import lru_cache
+from multiprocessing import shared_memory
 from datetime import datetime
 import xml.etree.ElementTree as ET
+try:
+    import resource
+except ImportError:  # Windows: no RLIMIT_NOFILE
+    resource = None
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -58,6 +72,71 @@ MENU_SIZE = (1280, 720)
 STREAM_SIZE = (1280, 920)
 FPS = 60
 CONFIG_FILE = "xbox_config.json"
+DISCOVERY_CACHE_FILE = "xbox_discovery_cache.json"
+DEVKIT_HTTP_POOL_SIZE = 8
+MONITOR_FAST_INTERVAL = 1.0
+MONITOR_SLOW_INTERVAL = 30.0
+MONITOR_BACKOFF = 1.5
+MONITOR_PROBE_TIMEOUT = 2.0
+MONITOR_FRESH_AGE = 5.0
+MONITOR_HISTORY = 120
+MONITOR_WORKERS = 8
+DISCOVERY_CACHE_MAX_AGE = 14 * 24 * 3600
+DISCOVERY_CONCURRENCY = 128
+DISCOVERY_MIN_CONCURRENCY = 16
+DISCOVERY_MAX_CONCURRENCY = 1024
+DISCOVERY_FD_HEADROOM = 64
+DISCOVERY_MIN_PREFIX = 20
+DISCOVERY_MAX_TARGETS = 65536
+DISCOVERY_PRIORITY_CONCURRENCY = 64
+DISCOVERY_PRIORITY_GRACE = 0.25
+DISCOVERY_CONNECT_TIMEOUT = 0.4
+DISCOVERY_PROBE_TIMEOUT = 1.5
+DISCOVERY_DNS_TIMEOUT = 1.0
+DISCOVERY_DNS_CONCURRENCY = 8
+DNS_CACHE_TTL = 3600
+DNS_NEGATIVE_TTL = 300
+RTSP_OPEN_TIMEOUT_MS = 3000
+RTSP_READ_TIMEOUT_MS = 2000
+VIDEO_STALL_TIMEOUT = 2.0
+RTSP_RECONNECT_MIN = 0.5
+RTSP_RECONNECT_MAX = 15.0
+INPUT_RECONNECT_MIN = 0.5
+INPUT_RECONNECT_MAX = 15.0
+INPUT_STABLE_AFTER = 5.0       # a session this long resets the reconnect backoff
+INPUT_STALE_POLICY = "releases" # input queued while disconnected: "drop" or "releases"
+INPUT_LOG_MAGIC = b"XBIN\x01"
+INPUT_SPIN_S = 0.002           # replay busy-waits this last stretch before each packet
+LATENCY_DIFF_THRESHOLD = 6.0   # mean abs gray-level change in the ROI that counts as a response
+LATENCY_STRIDE = 4             # ROI subsampling for frame differencing
+LATENCY_TIMEOUT = 2.0
+LATENCY_SETTLE = 0.5           # pause between trials, plus up to one frame of jitter
+IMG_TARGET_FPS = 30
+TRANSPORT_METRIC_WINDOW = 2.0
+REPLAY_SECONDS = 30
+REPLAY_FPS = 15
+REPLAY_MAX_BYTES = 256 * 1024 * 1024
+REPLAY_JPEG_QUALITY = 85
+FRAME_BUS_SLOTS = 4
+MJPEG_DEFAULT_PORT = 8090
+MJPEG_FPS = 30
+MJPEG_IDLE_FPS = 2
+MJPEG_QUALITY = 80
+MJPEG_CLIENT_TIMEOUT = 10
+WALL_UNFOCUSED_FPS = 5
+WALL_SCALE_WORKERS = max(2, (os.cpu_count() or 4) // 2)
+WALL_LABEL_HEIGHT = 30
+TRANSPORT_PROBE_INTERVAL = 30.0
+TRANSPORT_PROBE_MAX_INTERVAL = 240.0
+TRANSPORT_PROBE_WINDOW = 3.0
+TRANSPORT_MIN_DWELL = 10.0
+TRANSPORT_SWITCH_MARGIN = 1.3
+TRANSPORT_DEGRADED_FPS = 8.0
+TRANSPORT_DEGRADED_HOLD = 2.0
+TRANSPORT_MANUAL_HOLD = 120.0
+IMG_MAX_INFLIGHT = 4
+IMG_DECODE_WORKERS = 2
+IMG_FETCH_TIMEOUT = 1.2
 TELNET_CONNECT_TIMEOUT = 15
 TELNET_KEEPALIVE_INTERVAL = 10
 SSH_KEEPALIVE_INTERVAL = 20
@@ -87,6 +166,11 @@ APPX_SIGNING_PFX_ENV = "XBAX_APPX_PFX"
 APPX_SIGNING_PASSWORD_ENV = "XBAX_APPX_PFX_PASSWORD"
 APPX_PUBLISHER_ENV = "XBAX_APPX_PUBLISHER"
 HOST_IP_ENV = "XBAX_HOST_IP"
+HTTP_STATS_ENV = "XBAX_HTTP_STATS"
+VIDEO_STATS_ENV = "XBAX_VIDEO_STATS"
+FRAME_BUS_ENV = "XBAX_FRAME_BUS"
+MJPEG_PORT_ENV = "XBAX_MJPEG_PORT"
+INPUT_STALE_ENV = "XBAX_INPUT_STALE"
 TRIANGLE_CPP_SOURCE_DIR = os.path.join(REPO_ROOT, "HelloWin", "TriangleC++")
 TRIANGLE_CPP_TARGET = "TriangleCpp"
 TRIANGLE_CPP_BUILD_DIR = os.path.join(TRIANGLE_CPP_SOURCE_DIR, ".cliant-cmake", TRIANGLE_CPP_TARGET)
@@ -326,6 +410,118 @@ MOUSE_MOVE = 0x0001
 L_DOWN = 0x0002; L_UP = 0x0004; R_DOWN = 0x0008; R_UP = 0x0010
 M_DOWN = 0x0020; M_UP = 0x0040; WHEEL_V = 0x0800
 
+# ================== DEVKIT HTTPS POOL ==================
+#
+# Every request to a console's port 11443 (screenshots, credentials, power,
+# Device Portal) goes through one keep-alive connection pool per console so
+# repeated calls skip the TCP+TLS handshake against the self-signed endpoint.
+# urllib3 does not expose TLS session resumption for fresh sockets, so the
+# saving comes from reusing live connections; keep the pool deep enough that
+# concurrent callers (IMG video + portal + shell retries) don't evict each
+# other's connections.
+
+class _DevkitSession(requests.Session):
+    """Session bound to a console's shared adapter. Cookies and auth stay
+    per session; close() leaves the pooled connections to the pool."""
+
+    def close(self):
+        self.cookies.clear()
+
+class DevkitHttpPool:
+    def __init__(self, maxsize=DEVKIT_HTTP_POOL_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._adapters = {}
+        self._stats = {}
+        self._shared = {}  # ip -> session reused by the stateless get()/post() helpers
+
+    def _adapter(self, ip):
+        with self._lock:
+            adapter = self._adapters.get(ip)
+            if adapter is None:
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.maxsize, max_retries=0)
+                self._adapters[ip] = adapter
+                self._stats[ip] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "latency_total": 0.0,
+                    "latency_max": 0.0,
+                    "latencies": collections.deque(maxlen=512),
+                }
+            return adapter
+
+    def _record(self, ip, response, *args, **kwargs):
+        elapsed = response.elapsed.total_seconds()
+        with self._lock:
+            stats = self._stats[ip]
+            stats["requests"] += 1
+            if response.status_code >= 500:
+                stats["errors"] += 1
+            stats["latency_total"] += elapsed
+            stats["latency_max"] = max(stats["latency_max"], elapsed)
+            stats["latencies"].append(elapsed)
+
+    def session(self, ip, auth=None):
+        """Return a fresh session for <ip> that shares the console's pool."""
+        session = _DevkitSession()
+        session.verify = False
+        session.auth = auth
+        session.mount("https://", self._adapter(ip))
+        session.hooks["response"].append(lambda r, *a, **kw: self._record(ip, r))
+        return session
+
+    def request(self, method, ip, path, **kwargs):
+        with self._lock: session = self._shared.get(ip)
+        if session is None:
+            session = self.session(ip)
+            with self._lock: session = self._shared.setdefault(ip, session)
+        kwargs.setdefault("verify", False)
+        return session.request(method, f"https://{ip}:11443{path}", **kwargs)
+
+    def get(self, ip, path, **kwargs):
+        return self.request("GET", ip, path, **kwargs)
+
+    def post(self, ip, path, **kwargs):
+        return self.request("POST", ip, path, **kwargs)
+
+    def stats(self):
+        """Per-console counters: requests, TLS handshakes (new connections),
+        reused connections, server errors and request latency."""
+        summary = {}
+        with self._lock:
+            for ip, adapter in self._adapters.items():
+                pools = adapter.poolmanager.pools
+                handshakes = sum(pools[key].num_connections for key in pools.keys())
+                stats = self._stats[ip]
+                latencies = sorted(stats["latencies"])
+                count = stats["requests"]
+                summary[ip] = {
+                    "requests": count,
+                    "handshakes": handshakes,
+                    "reused": max(0, count - handshakes),
+                    "errors": stats["errors"],
+                    "latency_avg_ms": round(1000 * stats["latency_total"] / count, 1) if count else None,
+                    "latency_p95_ms": round(1000 * latencies[math.ceil(0.95 * len(latencies)) - 1], 1) if latencies else None,
+                    "latency_max_ms": round(1000 * stats["latency_max"], 1),
+                }
+        return summary
+
+    def format_stats(self):
+        lines = []
+        for ip, s in self.stats().items():
+            lines.append(
+                f"{ip}: {s['requests']} req, {s['handshakes']} handshakes, {s['reused']} reused, "
+                f"{s['errors']} 5xx, avg {s['latency_avg_ms']} ms, p95 {s['latency_p95_ms']} ms, "
+                f"max {s['latency_max_ms']} ms"
+            )
+        return lines or ["no port-11443 traffic yet"]
+
+devkit_http = DevkitHttpPool()
+
+if os.environ.get(HTTP_STATS_ENV, "").strip():
+    atexit.register(lambda: sys.stderr.write("".join(f"[http] {line}\n" for line in devkit_http.format_stats())))
+
 # ================== NETWORK SCANNER ==================
 def get_local_ip():
     forced_ip = os.environ.get(HOST_IP_ENV, "").strip()
@@ -341,59 +537,684 @@ def get_local_ip():
         s.close()
     return ip
 
-def _tcp_probe(ip, port=11443, timeout=0.4):
-    """Quick TCP connect to prime the ARP cache and weed out unreachable
-    hosts before the more expensive HTTPS probe. Returns True if the port
-    accepted a connection."""
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.settimeout(timeout)
+def _local_ipv4_interfaces():
+    """Return [(address, prefixlen)] for every configured IPv4 interface."""
+    found = []
     try:
-        s.connect((ip, port))
-        return True
-    except Exception:
-        return False
-    finally:
-        try: s.close()
-        except Exception: pass
+        if os.name == "nt":
+            out = subprocess.run(["ipconfig"], capture_output=True, text=True, timeout=3).stdout
+            address = None
+            for line in out.splitlines():
+                m = re.search(r"IPv4[^:]*:\s*([\d.]+)", line)
+                if m:
+                    address = m.group(1)
+                    continue
+                m = re.search(r"Subnet Mask[^:]*:\s*([\d.]+)", line)
+                if m and address:
+                    found.append((address, ipaddress.IPv4Network(f"0.0.0.0/{m.group(1)}").prefixlen))
+                    address = None
+        elif shutil.which("ip"):
+            out = subprocess.run(["ip", "-o", "-4", "addr", "show", "up"],
+                                 capture_output=True, text=True, timeout=3).stdout
+            for m in re.finditer(r"\binet\s+([\d.]+)/(\d+)", out):
+                found.append((m.group(1), int(m.group(2))))
+        elif shutil.which("ifconfig"):
+            out = subprocess.run(["ifconfig"], capture_output=True, text=True, timeout=3).stdout
+            for m in re.finditer(r"\binet\s+(?:addr:)?([\d.]+)\s+.*?(?:netmask|Mask:)\s*(0x[0-9a-fA-F]+|[\d.]+)", out):
+                mask = m.group(2)
+                if mask.startswith("0x"):
+                    mask = str(ipaddress.IPv4Address(int(mask, 16)))
+                found.append((m.group(1), ipaddress.IPv4Network(f"0.0.0.0/{mask}").prefixlen))
+    except (OSError, ValueError, subprocess.SubprocessError):
+        pass
+    return found
+
+def local_scan_networks():
+    """Local IPv4 networks to sweep, each narrowed to /DISCOVERY_MIN_PREFIX at most."""
+    forced_ip = os.environ.get(HOST_IP_ENV, "").strip()
+    networks = []
+    for address, prefix in _local_ipv4_interfaces():
+        try:
+            iface = ipaddress.IPv4Interface(f"{address}/{prefix}")
+        except ValueError:
+            continue
+        if iface.ip.is_loopback or iface.ip.is_link_local:
+            continue
+        if forced_ip and str(iface.ip) != forced_ip:
+            continue
+        if prefix < DISCOVERY_MIN_PREFIX:
+            iface = ipaddress.IPv4Interface(f"{address}/{DISCOVERY_MIN_PREFIX}")
+        if iface.network not in networks:
+            networks.append(iface.network)
+    if not networks:
+        networks.append(ipaddress.IPv4Interface(f"{get_local_ip()}/24").network)
+    return networks
+
+def parse_scan_cidrs(values):
+    """Parse `--cidr` values (repeatable, comma separated) into networks.
+    Raises ValueError for malformed ranges or ones too large to sweep."""
+    networks = []
+    for value in values:
+        for part in value.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            net = ipaddress.IPv4Network(part, strict=False)
+            if net.num_addresses > DISCOVERY_MAX_TARGETS:
+                raise ValueError(f"{part} has {net.num_addresses} addresses (limit {DISCOVERY_MAX_TARGETS})")
+            if net not in networks:
+                networks.append(net)
+    return networks
+
+def _sweep_targets(networks):
+    local = {address for address, _ in _local_ipv4_interfaces()}
+    targets = []
+    for net in networks:
+        hosts = net.hosts() if net.num_addresses > 2 else iter(net)
+        targets.extend(ip for ip in map(str, hosts) if ip not in local)
+    return targets
+
+# ================== DISCOVERY CACHE ==================
+#
+# Devkits we have confirmed before are persisted to DISCOVERY_CACHE_FILE so
+# the menu and `main.py scan` can list them instantly and revalidate them
+# with a handful of targeted probes before the full /24 sweep starts.
+# Entries are matched by MAC first (survives DHCP renumbering), then by
+# hostname, then by IP.
+
+_discovery_cache_lock = threading.Lock()
 
-def check_xbox(ip, timeout=1.5):
+def _normalize_mac(mac):
+    octets = re.split(r"[:-]", mac.strip().lower())
+    if len(octets) != 6 or not all(re.fullmatch(r"[0-9a-f]{1,2}", o) for o in octets):
+        return None
+    mac = ":".join(o.zfill(2) for o in octets)
+    if mac in ("00:00:00:00:00:00", "ff:ff:ff:ff:ff:ff") or mac.startswith("01:00:5e"):
+        return None
+    return mac
+
+def _read_neighbor_table():
+    """Return {ip: mac} for resolved entries in the kernel neighbor table."""
+    table = {}
     try:
-        res = requests.get(f"https://{ip}:11443/ext/screenshot",
-                           params={'download': 'false'},
-                           verify=False, timeout=timeout)
-        if res.status_code == 200:
-            try:
-                hostname = socket.gethostbyaddr(ip)[0].split('.')[0]
-            except:
-                hostname = "Xbox Devkit"
-            return (ip, hostname)
-    except:
+        with open("/proc/net/arp", "r") as f:
+            next(f, None)
+            for line in f:
+                parts = line.split()
+                mac = _normalize_mac(parts[3]) if len(parts) >= 4 else None
+                if mac:
+                    table[parts[0]] = mac
+        return table
+    except OSError:
+        pass
+
+    try:
+        if shutil.which("ip"):
+            out = subprocess.run(["ip", "-4", "neigh", "show"], capture_output=True, text=True, timeout=2).stdout
+            pattern = r"^([\d.]+)\s.*?\blladdr\s+([0-9a-fA-F:]+)"
+        else:
+            out = subprocess.run(["arp", "-a"] if os.name == "nt" else ["arp", "-an"],
+                                 capture_output=True, text=True, timeout=2).stdout
+            pattern = r"\(?([\d.]+)\)?\s+(?:at\s+)?([0-9a-fA-F]{1,2}(?:[:-][0-9a-fA-F]{1,2}){5})\b"
+        for m in re.finditer(pattern, out, re.MULTILINE):
+            mac = _normalize_mac(m.group(2))
+            if mac:
+                table[m.group(1)] = mac
+    except (OSError, subprocess.SubprocessError):
         pass
+    return table
+
+def load_discovery_cache():
+    """Return cached devkit entries, most recently seen first."""
+    try:
+        with open(DISCOVERY_CACHE_FILE, 'r') as f:
+            entries = json.load(f).get("devkits", [])
+    except (OSError, ValueError, AttributeError):
+        return []
+    cutoff = time.time() - DISCOVERY_CACHE_MAX_AGE
+    fresh = [e for e in entries
+             if isinstance(e, dict) and e.get("ip") and e.get("last_seen", 0) >= cutoff]
+    fresh.sort(key=lambda e: e.get("last_seen", 0), reverse=True)
+    return fresh
+
+def _find_cache_entry(entries, ip, hostname, mac):
+    if mac:
+        for entry in entries:
+            if entry.get("mac") == mac:
+                return entry
+    if hostname and hostname != "Xbox Devkit":
+        for entry in entries:
+            if entry.get("hostname") == hostname:
+                return entry
+    for entry in entries:
+        if entry.get("ip") == ip:
+            return entry
     return None
 
-def scan_network_async(result_list, callback):
-    local_ip = get_local_ip()
-    base = '.'.join(local_ip.split('.')[:-1])
-    ips = [f"{base}.{i}" for i in range(1, 255)]
-
-    # Pass 1: cheap TCP probe on port 11443 to warm ARP and cut the HTTPS
-    # candidate set down to hosts that are actually listening. This is what
-    # makes the *first* discovery as reliable as a "Refresh" — the original
-    # 0.6s HTTPS-only probe regularly timed out on cold ARP caches.
-    candidates = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=120) as exe:
-        for ip, alive in zip(ips, exe.map(_tcp_probe, ips)):
-            if alive:
-                candidates.append(ip)
-
-    # Pass 2: real HTTPS probe with a generous timeout on the survivors.
-    seen = set()
-    with concurrent.futures.ThreadPoolExecutor(max_workers=30) as exe:
-        for res in exe.map(check_xbox, candidates):
-            if res and res[0] not in seen:
-                seen.add(res[0])
+def remember_devkits(found):
+    """Merge confirmed (ip, hostname) hits into the discovery cache."""
+    if not found:
+        return
+    neighbors = _read_neighbor_table()
+    now = time.time()
+    with _discovery_cache_lock:
+        entries = load_discovery_cache()
+        for ip, hostname in found:
+            mac = neighbors.get(ip)
+            entry = _find_cache_entry(entries, ip, hostname, mac)
+            if entry is None:
+                entry = {}
+                entries.append(entry)
+            entry.update(ip=ip, hostname=hostname, last_seen=now)
+            if mac:
+                entry["mac"] = mac
+            with _hostname_cache_lock:
+                resolved = _hostname_cache.get(ip)
+            if resolved:
+                entry["hostname_resolved_at"] = resolved[1]
+
+        # A MAC/hostname match can leave an older record still claiming the
+        # same IP; keep only the most recently seen one per address.
+        entries.sort(key=lambda e: e.get("last_seen", 0), reverse=True)
+        unique, claimed = [], set()
+        for entry in entries:
+            if entry["ip"] not in claimed:
+                claimed.add(entry["ip"])
+                unique.append(entry)
+
+        tmp_path = DISCOVERY_CACHE_FILE + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({"devkits": unique}, f, indent=2)
+            os.replace(tmp_path, DISCOVERY_CACHE_FILE)
+        except OSError:
+            pass
+
+def _cached_devkit_candidates(entry, neighbors):
+    """IPs worth probing for a cached devkit: its last known address plus
+    wherever its MAC currently lives in the neighbor table."""
+    ips = [entry["ip"]]
+    mac = entry.get("mac")
+    if mac:
+        for ip, neighbor_mac in neighbors.items():
+            if neighbor_mac == mac and ip not in ips:
+                ips.append(ip)
+    return ips
+
+# Reverse-DNS answers are cached for DNS_CACHE_TTL (DNS_NEGATIVE_TTL for
+# hosts without a PTR record, so a sweep does not re-ask the resolver for
+# every one of them). The resolution time is persisted next to the hostname
+# in the discovery cache, so the TTL survives restarts.
+
+# gethostbyaddr() blocks in the resolver with no timeout of its own; keep it
+# on a small dedicated pool so callers can give up on it, and so asyncio.run()
+# never waits on a stuck PTR lookup at shutdown.
+_DNS_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=DISCOVERY_DNS_CONCURRENCY,
+                                                      thread_name_prefix="xbax-dns")
+_hostname_cache = {}
+_hostname_cache_lock = threading.Lock()
+_hostname_cache_seeded = False
+
+def cached_hostname(ip):
+    """Return (hit, hostname) from the reverse-DNS TTL cache. A hit with a
+    None hostname is a cached negative answer."""
+    global _hostname_cache_seeded
+    if not _hostname_cache_seeded:
+        entries = load_discovery_cache()
+        with _hostname_cache_lock:
+            for entry in entries:
+                if entry.get("hostname_resolved_at") and entry["ip"] not in _hostname_cache:
+                    name = entry.get("hostname")
+                    _hostname_cache[entry["ip"]] = (None if name == "Xbox Devkit" else name,
+                                                    entry["hostname_resolved_at"])
+            _hostname_cache_seeded = True
+    with _hostname_cache_lock:
+        hit = _hostname_cache.get(ip)
+    if hit is not None:
+        name, resolved_at = hit
+        if time.time() - resolved_at < (DNS_CACHE_TTL if name else DNS_NEGATIVE_TTL):
+            return True, name
+    return False, None
+
+def _store_hostname(ip, name):
+    with _hostname_cache_lock:
+        _hostname_cache[ip] = (name, time.time())
+
+def _gethostbyaddr_short(ip):
+    try:
+        return socket.gethostbyaddr(ip)[0].split('.')[0]
+    except OSError:
+        return None
+
+def _submit_reverse_lookup(ip):
+    """Start a lookup whose answer lands in the TTL cache whenever it
+    finishes, even if the caller has stopped waiting for it."""
+    future = _DNS_EXECUTOR.submit(_gethostbyaddr_short, ip)
+    future.add_done_callback(lambda f: f.cancelled() or _store_hostname(ip, f.result()))
+    return future
+
+def _reverse_lookup_timed_out(ip, future):
+    # Cache the slow resolver as a negative answer unless the lookup has
+    # finished in the meantime and already stored the real one.
+    with _hostname_cache_lock:
+        if not future.done():
+            _hostname_cache[ip] = (None, time.time())
+
+def resolve_hostname(ip, timeout=DISCOVERY_DNS_TIMEOUT):
+    """Blocking, cached reverse lookup bounded by `timeout`. Returns None
+    when <ip> has no PTR record or the resolver is too slow."""
+    hit, name = cached_hostname(ip)
+    if hit:
+        return name
+    future = _submit_reverse_lookup(ip)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        _reverse_lookup_timed_out(ip, future)
+        return None
+
+# ================== ASYNC DISCOVERY ENGINE ==================
+#
+# Every candidate host runs its own TCP connect -> HTTPS probe -> reverse DNS
+# pipeline on a single event loop, so a devkit is reported the moment its own
+# pipeline finishes instead of after the slowest host in the sweep. An
+# adaptive window bounds how many sockets are open at once.
+
+# Devkits ship a self-signed certificate; same trust model as verify=False.
+_DISCOVERY_SSL_CONTEXT = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+_DISCOVERY_SSL_CONTEXT.check_hostname = False
+_DISCOVERY_SSL_CONTEXT.verify_mode = ssl.CERT_NONE
+
+# Connect errors that mean *we* are out of sockets/ports/buffers rather than
+# that the remote host is absent. Any of these halves the concurrency window.
+_LOCAL_SOCKET_ERRNOS = {
+    code for code in (
+        getattr(errno, name, None)
+        for name in ("EMFILE", "ENFILE", "ENOBUFS", "EADDRNOTAVAIL", "EAGAIN", "ENOMEM",
+                     "WSAEMFILE", "WSAENOBUFS", "WSAEADDRNOTAVAIL")
+    ) if code is not None
+}
+
+def _discovery_socket_budget():
+    """Upper bound on sockets the sweep may hold open, derived from the
+    process file-descriptor limit minus what is already in use."""
+    if resource is None:
+        return DISCOVERY_MAX_CONCURRENCY
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return DISCOVERY_MAX_CONCURRENCY
+    in_use = DISCOVERY_FD_HEADROOM
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            in_use = len(os.listdir(fd_dir))
+            break
+        except OSError:
+            continue
+    budget = soft - in_use - DISCOVERY_FD_HEADROOM
+    return max(DISCOVERY_MIN_CONCURRENCY, min(DISCOVERY_MAX_CONCURRENCY, budget))
+
+class _AdaptiveLimiter:
+    """AIMD concurrency window: shrink on socket errors or rising timeouts, else grow."""
+
+    def __init__(self, initial, floor, ceiling, window=64):
+        self.floor = floor
+        self.ceiling = max(floor, ceiling)
+        self.limit = max(floor, min(initial, self.ceiling))
+        self.in_flight = 0
+        self._window = window
+        self._outcomes = collections.deque(maxlen=window)
+        self._since_adjust = 0
+        self._timeout_baseline = None
+        self._slow_start = True
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc_info):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def record(self, outcome):
+        self._outcomes.append(outcome)
+        self._since_adjust += 1
+        if outcome == "error":
+            self.limit = max(self.floor, self.limit // 2)
+            self._slow_start = False
+            self._since_adjust = 0
+            return
+        if self._since_adjust < self._window:
+            return
+        self._since_adjust = 0
+        timeout_rate = sum(1 for o in self._outcomes if o == "timeout") / len(self._outcomes)
+        if self._timeout_baseline is not None and timeout_rate > self._timeout_baseline + 0.2:
+            self.limit = max(self.floor, (self.limit * 3) // 4)
+            self._slow_start = False
+        elif self._slow_start:
+            self.limit = min(self.ceiling, self.limit * 2)
+        else:
+            self.limit = min(self.ceiling, self.limit + self.floor)
+        baseline = self._timeout_baseline
+        self._timeout_baseline = timeout_rate if baseline is None else 0.8 * baseline + 0.2 * timeout_rate
+
+async def _tcp_probe_async(ip, port=11443, timeout=DISCOVERY_CONNECT_TIMEOUT):
+    """TCP connect on 11443: "open", "closed", "timeout" or "error" (local exhaustion)."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except ConnectionRefusedError:
+        return "closed"
+    except asyncio.TimeoutError:
+        return "timeout"
+    except OSError as exc:
+        return "error" if exc.errno in _LOCAL_SOCKET_ERRNOS else "timeout"
+    except Exception:
+        return "timeout"
+    writer.transport.abort()
+    return "open"
+
+async def _https_probe_async(ip, timeout=DISCOVERY_PROBE_TIMEOUT):
+    """GET /ext/screenshot over TLS and report whether it answered 200.
+    Only the status line is read; the connection is dropped right after."""
+    writer = None
+
+    async def probe():
+        nonlocal writer
+        reader, writer = await asyncio.open_connection(ip, 11443, ssl=_DISCOVERY_SSL_CONTEXT)
+        writer.write(
+            f"GET /ext/screenshot?download=false HTTP/1.1\r\n"
+            f"Host: {ip}:11443\r\nConnection: close\r\n\r\n".encode("ascii")
+        )
+        await writer.drain()
+        status = (await reader.readline()).split()
+        return len(status) >= 2 and status[1] == b"200"
+
+    try:
+        return await asyncio.wait_for(probe(), timeout)
+    except Exception:
+        return False
+    finally:
+        if writer is not None:
+            writer.transport.abort()
+
+async def _reverse_dns_async(ip, timeout=DISCOVERY_DNS_TIMEOUT):
+    """Async counterpart of resolve_hostname() for the discovery engine."""
+    hit, name = cached_hostname(ip)
+    if hit:
+        return name
+    future = _submit_reverse_lookup(ip)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        _reverse_lookup_timed_out(ip, future)
+        return None
+
+async def _probe_devkit_pipeline(ip, limiter):
+    async with limiter:
+        outcome = await _tcp_probe_async(ip)
+        limiter.record("ok" if outcome in ("open", "closed") else outcome)
+        return outcome == "open" and await _https_probe_async(ip)
+
+async def discover_devkits(networks=None, concurrency=DISCOVERY_CONCURRENCY, expected=None):
+    """Yield (ip, hostname) for each devkit as soon as it is confirmed, cached
+    and neighbor-table hosts first; an ip is yielded again once its name resolves."""
+    networks = local_scan_networks() if networks is None else networks
+    neighbors = _read_neighbor_table()
+    priority, queued = [], set()
+    for entry in load_discovery_cache():
+        for ip in _cached_devkit_candidates(entry, neighbors):
+            if ip not in queued:
+                queued.add(ip)
+                priority.append((ip, entry.get("hostname")))
+    for ip in neighbors:
+        address = ipaddress.IPv4Address(ip)
+        if ip not in queued and any(address in net for net in networks):
+            queued.add(ip)
+            priority.append((ip, None))
+
+    # Priority candidates are few and known to be on-link, so they get a
+    # fixed-size window of their own instead of competing with the sweep.
+    priority_limiter = _AdaptiveLimiter(DISCOVERY_PRIORITY_CONCURRENCY, DISCOVERY_PRIORITY_CONCURRENCY,
+                                        DISCOVERY_PRIORITY_CONCURRENCY)
+    limiter = _AdaptiveLimiter(concurrency, DISCOVERY_MIN_CONCURRENCY, _discovery_socket_budget())
+    dns_slots = asyncio.Semaphore(DISCOVERY_DNS_CONCURRENCY)
+    results = asyncio.Queue()
+    found = {}
+    tasks = []
+    dns_tasks = set()
+
+    async def resolve(ip, hint):
+        async with dns_slots:
+            name = await _reverse_dns_async(ip)
+        if name and name != hint:
+            results.put_nowait((ip, name))
+        elif not name and not hint:
+            results.put_nowait((ip, "Xbox Devkit"))
+
+    def confirmed(ip, hint):
+        hit, name = cached_hostname(ip)
+        if hit:
+            results.put_nowait((ip, name or hint or "Xbox Devkit"))
+            return
+        results.put_nowait((ip, hint))
+        task = asyncio.ensure_future(resolve(ip, hint))
+        dns_tasks.add(task)
+        task.add_done_callback(dns_tasks.discard)
+
+    async def run_lane(targets, lane_limiter):
+        pending = iter(targets)
+
+        async def worker():
+            # All workers share one iterator; next() never awaits, so each
+            # target is handed out exactly once.
+            for ip, hint in pending:
+                if await _probe_devkit_pipeline(ip, lane_limiter):
+                    confirmed(ip, hint)
+
+        # One coroutine per slot the window could ever grow to; the limiter
+        # decides how many of them are actually connecting at any moment.
+        await asyncio.gather(*[worker() for _ in range(min(lane_limiter.ceiling, len(targets)))])
+
+    async def run_all(priority_task):
+        sweep = [(ip, None) for ip in await asyncio.to_thread(_sweep_targets, networks) if ip not in queued]
+        await asyncio.wait([priority_task], timeout=DISCOVERY_PRIORITY_GRACE)
+        await run_lane(sweep, limiter)
+        await priority_task
+        await asyncio.gather(*dns_tasks)
+
+    def lanes_finished(fut):
+        if not fut.cancelled():
+            fut.exception()
+        results.put_nowait(None)
+
+    tasks.append(asyncio.ensure_future(run_lane(priority, priority_limiter)))
+    tasks.append(asyncio.ensure_future(run_all(tasks[0])))
+    tasks[1].add_done_callback(lanes_finished)
+    try:
+        while True:
+            res = await results.get()
+            if res is None:
+                break
+            ip, hostname = res
+            if expected is not None and ip not in found and len(found) >= expected:
+                continue
+            found[ip] = hostname or found.get(ip)
+            yield res
+            # Once enough devkits are in, stay only for names still resolving.
+            if expected is not None and len(found) >= expected and all(found.values()):
+                break
+    finally:
+        for task in tasks + list(dns_tasks):
+            task.cancel()
+        remember_devkits([(ip, name or "Xbox Devkit") for ip, name in found.items()])
+
+def scan_network_async(result_list, callback, on_found=None):
+    """Thread entry point: feed discover_devkits() hits into `result_list`."""
+    async def consume():
+        async for ip, hostname in discover_devkits():
+            res = (ip, hostname or "Xbox Devkit")
+            for i, (known_ip, _) in enumerate(result_list):
+                if known_ip == ip:
+                    result_list[i] = res
+                    break
+            else:
                 result_list.append(res)
-    callback()
+            if on_found:
+                on_found(res)
+    try:
+        asyncio.run(consume())
+    finally:
+        callback()
+
+# ================== DEVKIT MONITOR ==================
+#
+# One background thread keeps presence/health state for every console the
+# launcher knows about. Each console is polled on its own schedule: right
+# after a state change it is re-checked every MONITOR_FAST_INTERVAL, and each
+# stable poll stretches the interval by MONITOR_BACKOFF up to
+# MONITOR_SLOW_INTERVAL, so a rack of idle kits costs a few requests a
+# minute. The 11443 probe goes through devkit_http and reuses its keep-alive
+# connection; SSH is a bare TCP connect on port 22.
+
+class DevkitMonitor:
+    PORTS = (11443, 22)
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._consoles = {}
+        self._thread = None
+        self._executor = None
+
+    def track(self, ip, hostname=None):
+        with self._cond:
+            entry = self._consoles.get(ip)
+            if entry is None:
+                self._consoles[ip] = {
+                    "hostname": hostname,
+                    "interval": MONITOR_FAST_INTERVAL,
+                    "next_due": 0.0,
+                    "in_flight": False,
+                    "last_probe": None,
+                    "last_change": None,
+                    "ports": {
+                        port: {"up": None, "rtt": None, "history": collections.deque(maxlen=MONITOR_HISTORY)}
+                        for port in self.PORTS
+                    },
+                }
+            elif hostname:
+                entry["hostname"] = hostname
+            if self._thread is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=MONITOR_WORKERS, thread_name_prefix="xbax-monitor")
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def forget(self, ip):
+        with self._cond:
+            self._consoles.pop(ip, None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                idle = [(ip, e) for ip, e in self._consoles.items() if not e["in_flight"]]
+                due = [ip for ip, e in idle if e["next_due"] <= now]
+                if not due:
+                    next_due = min((e["next_due"] for _, e in idle), default=None)
+                    self._cond.wait(timeout=None if next_due is None else next_due - now)
+                    continue
+                for ip in due:
+                    self._consoles[ip]["in_flight"] = True
+            for ip in due:
+                self._executor.submit(self._poll, ip)
+
+    def _probe_https(self, ip):
+        start = time.perf_counter()
+        try:
+            # Any HTTP answer means the devkit's web service is up; "/" is the
+            # Device Portal bootstrap page and is far smaller than a screenshot.
+            devkit_http.get(ip, "/", allow_redirects=False, timeout=MONITOR_PROBE_TIMEOUT)
+        except requests.RequestException:
+            return False, None
+        return True, time.perf_counter() - start
+
+    def _probe_tcp(self, ip, port):
+        start = time.perf_counter()
+        try:
+            socket.create_connection((ip, port), timeout=MONITOR_PROBE_TIMEOUT).close()
+        except OSError:
+            return False, None
+        return True, time.perf_counter() - start
+
+    def _poll(self, ip):
+        results = {11443: self._probe_https(ip), 22: self._probe_tcp(ip, 22)}
+        with self._cond:
+            entry = self._consoles.get(ip)
+            if entry is None:
+                return
+            now = time.monotonic()
+            changed = False
+            for port, (up, rtt) in results.items():
+                state = entry["ports"][port]
+                if state["up"] is not None and state["up"] != up:
+                    changed = True
+                state["up"] = up
+                state["rtt"] = rtt
+                state["history"].append((time.time(), up, rtt))
+            if changed:
+                entry["last_change"] = time.time()
+                entry["interval"] = MONITOR_FAST_INTERVAL
+            else:
+                entry["interval"] = min(MONITOR_SLOW_INTERVAL, entry["interval"] * MONITOR_BACKOFF)
+            entry["last_probe"] = now
+            entry["next_due"] = now + entry["interval"]
+            entry["in_flight"] = False
+            self._cond.notify_all()
+
+    def network_up(self, ip, max_age=MONITOR_FRESH_AGE, timeout=MONITOR_PROBE_TIMEOUT + 1.0):
+        """Whether <ip> answers on 11443, from a recent poll or a forced one."""
+        self.track(ip)
+        with self._cond:
+            entry = self._consoles[ip]
+            requested = time.monotonic()
+            if entry["last_probe"] is None or requested - entry["last_probe"] > max_age:
+                entry["next_due"] = 0.0
+                self._cond.notify_all()
+                self._cond.wait_for(lambda: (entry["last_probe"] or 0.0) >= requested, timeout)
+            return bool(entry["ports"][11443]["up"])
+
+    def status(self, ip):
+        """Snapshot for the UI: state is "online", "offline", "checking" or
+        "unknown" (not tracked)."""
+        with self._cond:
+            entry = self._consoles.get(ip)
+            if entry is None:
+                return {"state": "unknown", "label": "not monitored", "rtt_ms": None, "ssh_up": None}
+            https, ssh = entry["ports"][11443], entry["ports"][22]
+            if https["up"] is None:
+                state, label = "checking", "checking..."
+            elif https["up"]:
+                state = "online"
+                label = f"online {https['rtt'] * 1000:.0f} ms" + (" • SSH up" if ssh["up"] else " • SSH down")
+            else:
+                state, label = "offline", "offline"
+            return {
+                "state": state,
+                "label": label,
+                "rtt_ms": None if https["rtt"] is None else https["rtt"] * 1000,
+                "ssh_up": ssh["up"],
+                "last_change": entry["last_change"],
+            }
+
+    def history(self, ip, port=11443):
+        with self._cond:
+            entry = self._consoles.get(ip)
+            return list(entry["ports"][port]["history"]) if entry else []
+
+devkit_monitor = DevkitMonitor()
 
 # ================== UI ==================
 class Button:
@@ -440,6 +1261,7 @@ class IntegratedTerminal:
         self.cols = 140
         self.rows = 40
         self.grid = [[' ' for _ in range(self.cols)] for _ in range(self.rows)]
+        self._reset_vt_parser()
         self.history = [
             "[INFO] Xbox Devkit console ready",
             "[INFO] Drag files onto the window to upload them into the Sandbox."
@@ -468,6 +1290,10 @@ class IntegratedTerminal:
         self.retry_count = 0
         self.ip = None
         self.pin = None
+        self.replay = None
+        self.mjpeg = None
+        self.input = None
+        self.input_player = None
         self.installing = False
         self.package_busy = False
         self.bs_running = False
@@ -483,10 +1309,20 @@ class IntegratedTerminal:
         self._last_focused = None
         self._last_scroll = None
         self._last_rect = None
+        self._drawn_key = None
+        self._line_surfs = {}  # rendered text -> Surface, reused while a line is unchanged
 
     def _mark_dirty(self):
         self._dirty = True
 
+    def _frame_key(self):
+        return (self.focused, self.scroll_offset, tuple(self.rect), self.raw_input_mode, self.input_buffer,
+                self.focused and time.time() % 1 > 0.5)
+
+    def needs_redraw(self):
+        """True when draw() would paint something different from its last call."""
+        return self._dirty or self._cached_surf is None or self._frame_key() != self._drawn_key
+
     def _trim_history_locked(self):
         if len(self.history) > 2500:
             self.history = self.history[-1800:]
@@ -494,7 +1330,10 @@ class IntegratedTerminal:
             self.screen_history = self.screen_history[-1800:]
 
     def _active_display_lines_locked(self):
-        active_lines = [''.join(r).rstrip() for r in self.grid]
+        if len(self._row_text) != len(self.grid): self._touch_rows_locked()
+        for r in self._stale_rows: self._row_text[r] = ''.join(self.grid[r]).rstrip()
+        self._stale_rows.clear()
+        active_lines = self._row_text
         last_nonempty = -1
         for idx, line in enumerate(active_lines):
             if line:
@@ -662,6 +1501,38 @@ class IntegratedTerminal:
         stripped = command.strip()
         if not stripped:
             return False
+        if stripped.lower() == "httpstats":
+            for line in devkit_http.format_stats():
+                self.log(f"[http] {line}")
+            return True
+        if stripped.split(None, 1)[0].lower() == "replay":
+            try: parts = self._split_command_line(stripped)
+            except RuntimeError as exc:
+                self.log(f"[-] Replay failed: {exc}")
+                return True
+            if len(parts) > 2:
+                self.log("[-] Usage: replay [local-dir]")
+                return True
+            self.save_replay(parts[1] if len(parts) == 2 else None)
+            return True
+        if stripped.split(None, 1)[0].lower() == "mjpeg":
+            parts = stripped.split()
+            if len(parts) > 2:
+                self.log("[-] Usage: mjpeg [port|stop]")
+                return True
+            self.share_video(parts[1] if len(parts) == 2 else None)
+            return True
+        if stripped.split(None, 1)[0].lower() in ("inputrec", "inputplay"):
+            try: parts = self._split_command_line(stripped)
+            except RuntimeError as exc:
+                self.log(f"[-] {stripped.split(None, 1)[0]} failed: {exc}")
+                return True
+            if parts[0].lower() == "inputrec":
+                if len(parts) > 2: self.log("[-] Usage: inputrec [file|stop]")
+                else: self.record_input(parts[1] if len(parts) == 2 else None)
+            elif len(parts) not in (2, 3): self.log("[-] Usage: inputplay <file|stop> [speed]")
+            else: self.play_input(parts[1], parts[2] if len(parts) == 3 else None)
+            return True
         if stripped.split(None, 1)[0].lower() != "dump":
             return False
 
@@ -685,6 +1556,74 @@ class IntegratedTerminal:
         ).start()
         return True
 
+    def share_video(self, arg=None):
+        if self.mjpeg is None:
+            self.log("[-] No live stream to share.")
+            return
+        if arg and arg.lower() == "stop":
+            self.mjpeg.stop()
+            self.log("[*] MJPEG rebroadcast stopped.")
+            return
+        try:
+            port = self.mjpeg.start(int(arg) if arg else MJPEG_DEFAULT_PORT)
+        except ValueError:
+            self.log("[-] Usage: mjpeg [port|stop]")
+            return
+        except OSError as exc:
+            self.log(f"[-] MJPEG rebroadcast failed: {exc}")
+            return
+        self.log(f"[+] Rebroadcasting on http://{get_local_ip()}:{port}/  (stream.mjpg, latest.jpg)")
+
+    def record_input(self, arg=None):
+        if self.input is None:
+            self.log("[-] No remote input session to record.")
+            return
+        if arg and arg.lower() == "stop":
+            recorder = self.input.stop_recording()
+            if recorder: self.log(f"[+] Recorded {recorder.count} input packets to {recorder.path}")
+            else: self.log("[-] Input recording is not running.")
+            return
+        path = os.path.abspath(arg or f"input-{self.input.ip}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.xbin")
+        try: self.input.start_recording(path)
+        except OSError as exc:
+            self.log(f"[-] Input recording failed: {exc}")
+            return
+        self.log(f"[*] Recording input to {path} (inputrec stop to finish)")
+
+    def play_input(self, arg, speed=None):
+        if self.input is None:
+            self.log("[-] No remote input session to replay into.")
+            return
+        if arg.lower() == "stop":
+            if self.input_player: self.input_player.stop()
+            else: self.log("[-] No input replay is running.")
+            return
+        if self.input_player:
+            self.log("[-] An input replay is already running (inputplay stop).")
+            return
+        def done(player):
+            self.input_player = None
+            if player.error: self.log(f"[-] Input replay stopped: {player.error} ({player.summary()})")
+            else: self.log(f"[+] Input replay finished: {player.summary()}")
+        try:
+            self.input_player = InputPlayer(self.input, os.path.abspath(arg), float(speed or 1.0), on_done=done)
+        except (OSError, ValueError) as exc:
+            self.log(f"[-] Input replay failed: {exc}")
+            return
+        self.log(f"[*] Replaying {len(self.input_player.records)} input packets from {arg}...")
+        self.input_player.start()
+
+    def save_replay(self, local_dir=None):
+        if self.replay is None:
+            self.log("[-] No live stream to replay.")
+            return
+        def done(path, count, error):
+            if error: self.log(f"[-] Replay save failed: {error}")
+            else: self.log(f"[+] Saved {count} replay frames to {path}")
+        path, count = self.replay.flush(local_dir, on_done=done)
+        if count: self.log(f"[*] Writing last {count} frames to {path}...")
+        else: self.log("[-] Replay buffer is empty.")
+
     def log(self, message):
         with self.lock:
             self.history.append(message)
@@ -982,6 +1921,7 @@ class IntegratedTerminal:
             self.grid = new_grid
             self.cy = min(self.cy, new_rows - 1)
             self.rows = new_rows
+            self._touch_rows_locked()
             self._mark_dirty()
             if self.connected and self.sock:
                 try:
@@ -996,77 +1936,130 @@ class IntegratedTerminal:
         self._trim_history_locked()
         self.grid.pop(0)
         self.grid.append([' ' for _ in range(self.cols)])
+        if len(self._row_text) == len(self.grid):
+            self._row_text.pop(0)
+            self._row_text.append('')
+            self._stale_rows = {r - 1 for r in self._stale_rows if r > 0}
         self.cy = max(0, self.cy - 1)
         self._mark_dirty()
 
     def clear_screen(self):
         self.grid = [[' ' for _ in range(self.cols)] for _ in range(self.rows)]
+        self._touch_rows_locked()
         self.cx = 0
         self.cy = 0
         self._mark_dirty()
 
-    def write(self, data):
-        text = data.decode('utf-8', errors='replace')
-        text = re.sub(r'\xff[\xfb-\xfe].', '', text)
-        text = re.sub(r'\xff[\xf0-\xfa]', '', text)
-        tokens = re.split(r'(\x1b\[[0-9;?]*[A-Za-z])', text)
+    # Incoming shell bytes go through three incremental stages, each keeping its state
+    # across recv() boundaries: telnet IAC stripping (byte level), UTF-8 decoding, and a
+    # VT100 tokenizer that holds back an escape sequence cut off at the end of a chunk.
+    _VT_TOKEN = re.compile(
+        r'(?P<text>[^\x00-\x1f\x7f]+)'
+        r'|\x1b\[(?P<params>[0-?]*)[ -/]*(?P<final>[@-~])'
+        r'|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)'  # OSC (window title): ignored
+        r'|\x1b[ -Z\\^-~]'                 # other two-byte escapes: ignored
+        r'|(?P<ctl>[\x00-\x1a\x1c-\x1f\x7f])')
+    _VT_PARTIAL = re.compile(r'\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?)?\Z')
+
+    def _reset_vt_parser(self):
+        self._iac_state = None
+        self._utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._vt_pending = ''
+        self._touch_rows_locked()
+
+    def _touch_rows_locked(self):
+        self._row_text = [''] * len(self.grid)
+        self._stale_rows = set(range(len(self.grid)))
+
+    def _strip_telnet(self, data):
+        if self._iac_state is None and b'\xff' not in data: return data
+        out, state = bytearray(), self._iac_state
+        for b in data:  # only chunks carrying telnet negotiation take this path
+            if state is None:
+                if b == 0xFF: state = 'iac'
+                else: out.append(b)
+            elif state == 'iac':
+                if b == 0xFF:  # escaped 0xFF data byte
+                    out.append(b)
+                    state = None
+                elif 0xFB <= b <= 0xFE: state = 'opt'       # WILL/WONT/DO/DONT <option>
+                elif b == 0xFA: state = 'sb'                # subnegotiation until IAC SE
+                else: state = None
+            elif state == 'opt': state = None
+            elif state == 'sb': state = 'sb-iac' if b == 0xFF else 'sb'
+            else: state = None if b == 0xF0 else 'sb'
+        self._iac_state = state
+        return bytes(out)
+
+    def _newline_locked(self):
+        self.cx = 0
+        self.cy += 1
+        if self.cy >= self.rows:
+            self.scroll_up()
+            self.cy = self.rows - 1
+
+    def _put_text_locked(self, run):
+        while run:
+            if self.cx >= self.cols: self._newline_locked()
+            n = min(len(run), self.cols - self.cx)
+            self.grid[self.cy][self.cx:self.cx + n] = run[:n]
+            self._stale_rows.add(self.cy)
+            self.cx += n
+            run = run[n:]
+
+    def _blank_locked(self, row, start=0):
+        self.grid[row][start:] = ' ' * (self.cols - start)
+        self._stale_rows.add(row)
+
+    def _csi_locked(self, params, code):
+        args = params.replace('?', '').split(';') if params else []
+        n = int(args[0]) if args and args[0].isdigit() else None
+        if code == 'J':
+            if n == 2:
+                self.clear_screen()
+            elif not n:
+                self._blank_locked(self.cy, self.cx)
+                for r in range(self.cy + 1, self.rows): self._blank_locked(r)
+        elif code == 'K':
+            if not n: self._blank_locked(self.cy, self.cx)
+            elif n == 2: self._blank_locked(self.cy)
+        elif code in ('H', 'f'):
+            self.cy = max(0, min(self.rows - 1, (n or 1) - 1))
+            c = int(args[1]) if len(args) > 1 and args[1].isdigit() else 1
+            self.cx = max(0, min(self.cols - 1, c - 1))
+        elif code == 'A': self.cy = max(0, self.cy - (n or 1))
+        elif code == 'B': self.cy = min(self.rows - 1, self.cy + (n or 1))
+        elif code == 'C': self.cx = min(self.cols - 1, self.cx + (n or 1))
+        elif code == 'D': self.cx = max(0, self.cx - (n or 1))
 
+    def write(self, data):
+        text = self._utf8.decode(self._strip_telnet(data))
         with self.lock:
-            for token in tokens:
-                if not token: continue
-                if token.startswith('\x1b['):
-                    code = token[-1]
-                    args_str = token[2:-1].replace('?', '')
-                    args = args_str.split(';') if args_str else []
-                    if code == 'J':
-                        arg = args[0] if args else '0'
-                        if arg == '2':
-                            self.clear_screen()
-                        elif arg == '0':
-                            for c in range(self.cx, self.cols): self.grid[self.cy][c] = ' '
-                            for r in range(self.cy + 1, self.rows): self.grid[r] = [' '] * self.cols
-                    elif code == 'K':
-                        arg = args[0] if args else '0'
-                        if arg == '0':
-                            for c in range(self.cx, self.cols): self.grid[self.cy][c] = ' '
-                        elif arg == '2':
-                            self.grid[self.cy] = [' '] * self.cols
-                    elif code in ('H', 'f'):
-                        r = int(args[0])-1 if len(args)>0 and args[0] else 0
-                        c = int(args[1])-1 if len(args)>1 and args[1] else 0
-                        self.cy = max(0, min(self.rows-1, r))
-                        self.cx = max(0, min(self.cols-1, c))
-                    elif code == 'A': self.cy = max(0, self.cy - (int(args[0]) if args and args[0] else 1))
-                    elif code == 'B': self.cy = min(self.rows-1, self.cy + (int(args[0]) if args and args[0] else 1))
-                    elif code == 'C': self.cx = min(self.cols-1, self.cx + (int(args[0]) if args and args[0] else 1))
-                    elif code == 'D': self.cx = max(0, self.cx - (int(args[0]) if args and args[0] else 1))
-                else:
-                    for char in token:
-                        if char == '\n':
-                            self.cy += 1
-                            self.cx = 0
-                            if self.cy >= self.rows:
-                                self.scroll_up()
-                                self.cy = self.rows - 1
-                        elif char == '\r':
-                            self.cx = 0
-                        elif char in ('\x08', '\b'):
-                            self.cx = max(0, self.cx - 1)
-                        elif char == '\t':
-                            self.cx = min(self.cols - 1, (self.cx + 4) // 4 * 4)
-                        elif char == '\x0c':
-                            self.clear_screen()
-                        elif ord(char) >= 32:
-                            if self.cx >= self.cols:
-                                self.cx = 0
-                                self.cy += 1
-                                if self.cy >= self.rows:
-                                    self.scroll_up()
-                                    self.cy = self.rows - 1
-                            self.grid[self.cy][self.cx] = char
-                            self.cx += 1
-
-        self._mark_dirty()
+            text, self._vt_pending = self._vt_pending + text, ''
+            cy, pos, end = self.cy, 0, len(text)
+            token = self._VT_TOKEN.match
+            while pos < end:
+                m = token(text, pos)
+                if m is None:  # lone ESC: either cut off by the chunk boundary or malformed
+                    if self._VT_PARTIAL.match(text, pos) and end - pos < 256:
+                        self._vt_pending = text[pos:]
+                        break
+                    pos += 1
+                    continue
+                pos = m.end()
+                if m.group('text'):
+                    self._put_text_locked(m.group('text'))
+                elif m.group('final'):
+                    self._csi_locked(m.group('params'), m.group('final'))
+                elif m.group('ctl'):
+                    char = m.group('ctl')
+                    if char == '\n': self._newline_locked()
+                    elif char == '\r': self.cx = 0
+                    elif char == '\x08': self.cx = max(0, self.cx - 1)
+                    elif char == '\t': self.cx = min(self.cols - 1, (self.cx + 4) // 4 * 4)
+                    elif char == '\x0c': self.clear_screen()
+            changed = bool(self._stale_rows) or self.cy != cy
+        if changed: self._mark_dirty()
 
     def scroll(self, amount):
         with self.lock:
@@ -1195,10 +2188,14 @@ class IntegratedTerminal:
             wrapped = wrapped[-max_rows:]
 
             y = 10
+            line_surfs = {}
             for line in wrapped:
                 if line:
-                    surf.blit(self.font.render(line, True, UI_COLORS["terminal_text"]), (12, y))
+                    rendered = line_surfs.get(line) or self._line_surfs.get(line) or self.font.render(line, True, UI_COLORS["terminal_text"])
+                    line_surfs[line] = rendered
+                    surf.blit(rendered, (12, y))
                 y += self.line_h
+            self._line_surfs = line_surfs
 
             self._cached_surf = surf
             self._dirty = False
@@ -1222,6 +2219,7 @@ class IntegratedTerminal:
             prompt = "> " + self.input_buffer + cursor
             ps = self.font.render(prompt, True, UI_COLORS["terminal_text"])
             screen.blit(ps, (self.rect.x + 12, footer_y))
+        self._drawn_key = self._frame_key()
 
     def upload_file(self, filepath):
         if not self.ssh_client or not self.ssh_client.get_transport().is_active():
@@ -2611,9 +3609,7 @@ class IntegratedTerminal:
         return candidates
 
     def _open_device_portal_session(self, ip, auth):
-        session = requests.Session()
-        if auth:
-            session.auth = auth
+        session = devkit_http.session(ip, auth)
 
         try:
             bootstrap = session.get(
@@ -3682,7 +4678,9 @@ class IntegratedTerminal:
             self.connected = True
             self.retry_count = 0
             self.focused = True
-            with self.lock: self.history.append(f"[+] Full SYSTEM shell via raw Telnet ({ip}:{port})")
+            with self.lock:
+                self._reset_vt_parser()
+                self.history.append(f"[+] Full SYSTEM shell via raw Telnet ({ip}:{port})")
             self._mark_dirty()
 
             def reader():
@@ -3709,13 +4707,7 @@ class IntegratedTerminal:
 
                             if self.retry_count >= 5:
                                 def check_and_prompt():
-                                    try:
-                                        res = requests.get(f"https://{self.ip}:11443/ext/screenshot",
-                                                           params={'download': 'false'}, verify=False, timeout=2.0)
-                                        network_up = (res.status_code == 200)
-                                    except: network_up = False
-
-                                    if network_up:
+                                    if devkit_monitor.network_up(self.ip):
                                         with self.lock: self.history.append("[-] Max retries reached. Sandbox daemon appears hung.")
                                         self.needs_reboot_prompt = True
                                     else:
@@ -3773,112 +4765,1342 @@ class IntegratedTerminal:
             except: pass
 
 # ================== VIDEO & INPUT ==================
-class FastVideoStream:
-    def __init__(self, ip):
-        self.url = f"rtsp://{ip}:11442/video/live"
-        os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "rtsp_transport;tcp|fflags;nobuffer|flags;low_delay"
-        self.stream = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
-        self.stream.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        self.grabbed, self.frame = self.stream.read()
+def _fit_frame(w, h, target_size):
+    scale = min(target_size[0]/max(1,w), target_size[1]/max(1,h))
+    return max(1,int(w*scale)), max(1,int(h*scale))
+
+def _frombuffer_bgr_supported():
+    try:
+        pygame.image.frombuffer(bytes(3), (1,1), "BGR")
+        return True
+    except (ValueError, TypeError): return False  # pygame < 2.1.3
+
+class FramePresenter:
+    """Scales decoded frames into a persistent Surface sized for the video pane.
+
+    RTSP frames are resized by OpenCV straight into a preallocated BGR buffer that the
+    Surface wraps through the buffer protocol, so there is no colour pass, transpose or
+    per-frame allocation. IMG surfaces are scaled into a reused destination surface."""
+    BGR = _frombuffer_bgr_supported()
+
+    def __init__(self):
+        self.key = None
+        self.buffer = None
+        self.surface = None
+
+    def _reuse(self, key, make):
+        if key != self.key:
+            self.buffer, self.surface = make()
+            self.key = key
+        return self.surface
+
+    def present(self, data, target_size):
+        if isinstance(data, np.ndarray): return self._present_bgr(data, target_size)
+        return self._present_surface(data, target_size)
+
+    def _present_bgr(self, frame, target_size):
+        h, w = frame.shape[:2]
+        nw, nh = _fit_frame(w, h, target_size)
+        def make():
+            buf = np.empty((nh, nw, 3), np.uint8)
+            return buf, pygame.image.frombuffer(buf, (nw, nh), "BGR" if self.BGR else "RGB")
+        surf = self._reuse(("bgr", nw, nh), make)
+        cv2.resize(frame, (nw, nh), dst=self.buffer, interpolation=cv2.INTER_LINEAR)
+        if not self.BGR: cv2.cvtColor(self.buffer, cv2.COLOR_BGR2RGB, dst=self.buffer)
+        return surf
+
+    def _present_surface(self, image, target_size):
+        w, h = image.get_size()
+        nw, nh = _fit_frame(w, h, target_size)
+        if (nw, nh) == (w, h): return image
+        surf = self._reuse(("surf", nw, nh, image.get_bitsize(), image.get_masks()),
+                           lambda: (None, pygame.Surface((nw, nh), 0, image)))
+        return pygame.transform.scale(image, (nw, nh), surf)
+
+class FrameBuffers:
+    """Triple-buffered, display-ready frames shared by a decode worker and the UI thread.
+
+    The worker scales each frame into a back slot and publishes it; the UI takes the newest
+    published slot as its front buffer. A writer never touches the slot being blitted or the
+    one waiting to be picked up, so neither side waits on the other's pixel work."""
+    SLOTS = 3
+
+    def __init__(self):
+        self.slots = [FramePresenter() for _ in range(self.SLOTS)]
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.target_size = (0, 0)
+        self.ready = None           # slot published but not yet taken by the UI
+        self.front = None           # slot the UI is blitting
+        self.shown = (0, 0.0, None) # (seq, timestamp, surface) of the front slot
+        self.pending = self.shown
+
+    def publish(self, frame, seq, frame_time):
+        target = self.target_size
+        if frame is None or target[0] <= 0 or target[1] <= 0: return  # video pane hidden
+        with self.write_lock:
+            with self.lock:
+                back = next(i for i in range(self.SLOTS) if i not in (self.ready, self.front))
+            surf = self.slots[back].present(frame, target)
+            with self.lock:
+                self.ready = back
+                self.pending = (seq, frame_time, surf)
+
+    def take(self):
+        with self.lock:
+            if self.ready is not None:
+                self.front, self.ready = self.ready, None
+                self.shown = self.pending
+            return self.shown
+
+class VideoStream:
+    """Frame bookkeeping shared by the RTSP and IMG transports.
+
+    Subclasses provide update(), which start() runs on a worker thread; it hands every decoded
+    frame to _publish(), which stamps it and scales it to the video pane's size there, off the
+    pygame main thread."""
+    def __init__(self):
+        self.frame = None
+        self.seq = 0
+        self.frame_time = 0.0
         self.stopped = False
         self.lock = threading.Lock()
+        self.buffers = FrameBuffers()
+        self.thread = None
+        self.started = time.monotonic()
+        self.frame_times = collections.deque(maxlen=256)
+        self.decode_ms = None  # EWMA of client-side decode + scale cost per frame
+        self.replay = None     # ReplayBuffer fed by the worker, set on the active stream only
+        self.stats = None      # VideoStats, likewise
+        self.bus = None        # FrameBus, likewise
+        self.mjpeg = None      # MjpegServer, likewise
+        self.scale_pool = None     # shared executor for scaling only (video wall); decode stays on the worker
+        self.frame_interval = 0.0  # minimum seconds between converted frames; 0 takes every frame
+        self.scale_pending = None
 
     def start(self):
-        threading.Thread(target=self.update, daemon=True).start()
+        self.thread = threading.Thread(target=self.update, daemon=True)
+        self.thread.start()
         return self
 
-    def update(self):
-        while not self.stopped:
-            g, f = self.stream.read()
-            with self.lock:
-                if g: self.frame = f; self.grabbed = g
+    def _publish(self, frame, decode_s=0.0, read_s=0.0):
+        with self.lock:
+            self.frame = frame
+            self.seq += 1
+            self.frame_time = time.monotonic()
+            self.frame_times.append(self.frame_time)
+            seq, ts = self.seq, self.frame_time
+        if self.bus: self.bus.publish(frame, seq)  # before the UI can see (and blit) the frame
+        if self.mjpeg: self.mjpeg.offer(frame)
+        if self.scale_pool is None:
+            self._scale(frame, seq, ts, decode_s, read_s)
+            return
+        with self.lock:  # coalesce: a queued scale job always picks up the newest frame
+            queued = self.scale_pending is not None
+            self.scale_pending = (frame, seq, ts, decode_s, read_s)
+        if not queued:
+            try: self.scale_pool.submit(self._scale_pending)
+            except RuntimeError: pass  # pool shut down with the wall
+
+    def _scale_pending(self):
+        with self.lock: item, self.scale_pending = self.scale_pending, None
+        if item: self._scale(*item)
+
+    def _scale(self, frame, seq, ts, decode_s, read_s):
+        t0 = time.monotonic()
+        self.buffers.publish(frame, seq, ts)
+        scale_s = time.monotonic() - t0
+        cost = (decode_s + scale_s) * 1000.0
+        self.decode_ms = cost if self.decode_ms is None else self.decode_ms * 0.9 + cost * 0.1
+        if self.stats: self.stats.on_decoded(seq, read_s, decode_s, scale_s)
+
+    def metrics(self, window=TRANSPORT_METRIC_WINDOW):
+        """Delivered fps over the last window, age of the newest frame and decode cost (ms)."""
+        now = time.monotonic()
+        span = max(0.25, min(window, now - self.started))
+        with self.lock:
+            recent = sum(1 for t in self.frame_times if now - t <= span)
+            age = now - self.frame_time if self.seq else None
+        return {"fps": recent / span, "age": age, "decode_ms": self.decode_ms}
+
+    def set_target(self, size):
+        """Called from layout_panels; rescales the current frame so a resize shows up at once."""
+        if size == self.buffers.target_size: return
+        self.buffers.target_size = size
+        seq, ts, frame = self.latest()
+        self.buffers.publish(frame, seq, ts)
+
+    def latest(self):
+        """(seq, monotonic timestamp, decoded frame); seq only grows, and repeats while no new frame arrived."""
+        with self.lock: return self.seq, self.frame_time, self.frame
+
+    def display(self):
+        """(seq, timestamp, Surface) scaled for the pane, or a None Surface before the first frame."""
+        return self.buffers.take()
 
     def read(self):
-        with self.lock: return self.grabbed, self.frame
+        with self.lock: return self.frame is not None, self.frame
+
+    def status(self):
+        """'connecting' before the first frame, then 'connected' or 'stalled' from frame age."""
+        if not self.seq: return "connecting"
+        return "stalled" if time.monotonic() - self.frame_time > VIDEO_STALL_TIMEOUT else "connected"
 
     def stop(self):
         self.stopped = True
-        self.stream.release()
 
-class IMGVideoStream:
+class FastVideoStream(VideoStream):
+    """RTSP transport under a watchdog.
+
+    Read failures and frame gaps longer than VIDEO_STALL_TIMEOUT mark the stream stalled; the
+    capture is then reopened with exponential backoff. Waits go through an Event, so a dead
+    session costs no CPU and stop() interrupts a pending backoff."""
     def __init__(self, ip):
-        self.url = f"https://{ip}:11443/ext/screenshot"
-        self.session = requests.Session()
-        self.stopped = False
-        self.frame_surf = None
-        self.lock = threading.Lock()
+        super().__init__()
+        self.url = f"rtsp://{ip}:11442/video/live"
+        self.wake = threading.Event()
+        self.state = "connecting"
+        self.reconnects = 0
+        self.stream = self._open()
+        self.grabbed, f = self.stream.read()
+        if self.grabbed:
+            self._publish(f)
+            self.state = "connected"
+
+    def _open(self):
+        os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "rtsp_transport;tcp|fflags;nobuffer|flags;low_delay"
+        params = []
+        if hasattr(cv2, "CAP_PROP_READ_TIMEOUT_MSEC"):  # OpenCV >= 4.6; older builds block in FFmpeg's own timeout
+            params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, RTSP_OPEN_TIMEOUT_MS, cv2.CAP_PROP_READ_TIMEOUT_MSEC, RTSP_READ_TIMEOUT_MS]
+        stream = cv2.VideoCapture(self.url, cv2.CAP_FFMPEG, params) if params else cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
+        stream.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return stream
 
-    def start(self):
-        threading.Thread(target=self.update, daemon=True).start()
-        return self
+    def update(self):
+        backoff = RTSP_RECONNECT_MIN
+        progress = last_frame = time.monotonic()
+        while not self.stopped:
+            opened = self.stream.isOpened()
+            t0 = time.monotonic()
+            g, f = (self.stream.grab() if opened else False), None
+            if g and time.monotonic() - last_frame < self.frame_interval:
+                progress = time.monotonic()  # throttled: decoded, but skip the full-size BGR conversion
+                continue
+            if g: g, f = self.stream.retrieve()
+            if g:
+                last_frame = time.monotonic()
+                self._publish(f, read_s=last_frame - t0)
+                if self.replay: self.replay.offer_frame(f)
+                self.state = "connected"
+                progress = time.monotonic()
+                backoff = RTSP_RECONNECT_MIN
+                continue
+            if opened and time.monotonic() - progress < VIDEO_STALL_TIMEOUT:
+                self.state = "stalled" if self.seq else "connecting"
+                if self.wake.wait(0.05): break
+                continue
+            self.state = "reconnecting"
+            self.stream.release()
+            if self.wake.wait(backoff): break
+            backoff = min(backoff * 2, RTSP_RECONNECT_MAX)
+            self.stream = self._open()
+            self.reconnects += 1
+            progress = time.monotonic()
+        self.stream.release()
+
+    def status(self):
+        state = self.state
+        if state == "connected" and time.monotonic() - self.frame_time > VIDEO_STALL_TIMEOUT:
+            return "stalled"  # read() is blocked inside FFmpeg with nothing arriving
+        return state
+
+    def stop(self):
+        self.stopped = True
+        self.wake.set()
+        if self.thread is None: self.stream.release()
+
+class IMGVideoStream(VideoStream):
+    """Screenshot-polling transport with several requests in flight.
+
+    Requests are issued at IMG_TARGET_FPS pace, up to a depth of about RTT / frame interval,
+    each on a pooled keep-alive connection. Responses are decoded on a small worker pool and
+    a frame is dropped if a later request has already been shown. With bgr=True frames are
+    decoded by OpenCV into BGR arrays like RTSP's, for headless consumers."""
+    def __init__(self, ip, bgr=False):
+        super().__init__()
+        self.ip = ip
+        self.bgr = bgr
+        self.url = f"https://{ip}:11443/ext/screenshot"
+        self.local = threading.local()
+        self.slots = threading.Condition()
+        self.order_lock = threading.Lock()
+        self.inflight = 0
+        self.issued = 0
+        self.newest = 0    # request number of the last frame published
+        self.rtt = None    # EWMA of successful request round trips, seconds
+        self.fetchers = concurrent.futures.ThreadPoolExecutor(IMG_MAX_INFLIGHT, thread_name_prefix="xbax-img-fetch")
+        self.decoders = concurrent.futures.ThreadPoolExecutor(IMG_DECODE_WORKERS, thread_name_prefix="xbax-img-decode")
+
+    def interval(self):
+        return max(1.0 / IMG_TARGET_FPS, self.frame_interval)
+
+    def depth(self):
+        if self.rtt is None: return 1
+        return max(1, min(IMG_MAX_INFLIGHT, int(math.ceil(self.rtt / self.interval()))))
 
     def update(self):
+        next_at = time.monotonic()
         while not self.stopped:
-            try:
-                r = self.session.get(self.url, params={'download':'false','hdr':'false','_':int(time.time()*1000)},
-                                     verify=False, timeout=1.2)
-                if r.status_code == 200:
-                    surf = pygame.image.load(io.BytesIO(r.content))
-                    with self.lock: self.frame_surf = surf
-            except: pass
-            time.sleep(0.033)
+            interval = self.interval()
+            with self.slots:
+                while not self.stopped and self.inflight >= self.depth(): self.slots.wait(0.5)
+                if self.stopped: break
+                self.inflight += 1
+                self.issued += 1
+                n = self.issued
+            try: self.fetchers.submit(self._fetch, n)
+            except RuntimeError: break  # stopped while submitting
+            next_at = max(next_at + interval, time.monotonic())
+            time.sleep(max(0.0, next_at - time.monotonic()))
+
+    def _session(self):
+        s = getattr(self.local, "session", None)
+        if s is None: s = self.local.session = devkit_http.session(self.ip)
+        return s
+
+    def _fetch(self, n):
+        t0 = time.monotonic()
+        content = None
+        try:
+            r = self._session().get(self.url, params={'download':'false','hdr':'false','_':int(time.time()*1000)},
+                                    verify=False, timeout=IMG_FETCH_TIMEOUT)
+            if r.status_code == 200: content = r.content
+        except requests.RequestException: pass
+        rtt = time.monotonic() - t0
+        with self.slots:
+            self.inflight -= 1
+            if content is not None:
+                self.rtt = rtt if self.rtt is None else self.rtt * 0.8 + rtt * 0.2
+            self.slots.notify()
+        if content is None: return
+        if n <= self.newest or self.stopped:
+            if self.stats: self.stats.on_discarded()
+            return
+        try: self.decoders.submit(self._decode, n, content, rtt)
+        except RuntimeError: pass
 
-    def read(self):
-        with self.lock: return self.frame_surf is not None, self.frame_surf
+    def _decode(self, n, content, rtt):
+        if n <= self.newest:
+            if self.stats: self.stats.on_discarded()
+            return
+        t0 = time.monotonic()
+        if self.bgr:
+            surf = cv2.imdecode(np.frombuffer(content, np.uint8), cv2.IMREAD_COLOR)
+            if surf is None: return
+        else:
+            try: surf = pygame.image.load(io.BytesIO(content))
+            except pygame.error: return
+        decode_s = time.monotonic() - t0
+        with self.order_lock:
+            if n <= self.newest:  # out of order: a later request already made it
+                if self.stats: self.stats.on_discarded()
+                return
+            self.newest = n
+            self._publish(surf, decode_s, rtt)
+            if self.replay: self.replay.add(content, ".jpg" if content[:2] == b"\xff\xd8" else ".png")
 
     def stop(self):
         self.stopped = True
+        with self.slots: self.slots.notify_all()
+        self.fetchers.shutdown(wait=False, cancel_futures=True)
+        self.decoders.shutdown(wait=False, cancel_futures=True)
+
+class ReplayBuffer:
+    """The last REPLAY_SECONDS of compressed frames, so a repro can be saved after the fact.
+
+    IMG screenshots are kept as the PNG/JPEG bytes received. Decoded RTSP frames are JPEG
+    encoded at up to REPLAY_FPS on one encoder thread that always takes the newest frame, so
+    the capture loop never waits on it. Memory is bounded by age and REPLAY_MAX_BYTES."""
+    def __init__(self, label="xbox", seconds=REPLAY_SECONDS, max_bytes=REPLAY_MAX_BYTES):
+        self.label = label
+        self.seconds, self.max_bytes = seconds, max_bytes
+        self.frames = collections.deque()  # (monotonic, wall clock, ext, bytes)
+        self.size = 0
+        self.lock = threading.Lock()
+        self.pending = None
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.last_offer = 0.0
+        self.encoder = None
+
+    def add(self, data, ext, ts=None):
+        now = time.monotonic()
+        ts = now if ts is None else ts
+        with self.lock:
+            self.frames.append((ts, time.time() - (now - ts), ext, data))
+            self.size += len(data)
+            while self.frames and (self.size > self.max_bytes or ts - self.frames[0][0] > self.seconds):
+                self.size -= len(self.frames.popleft()[3])
+
+    def offer_frame(self, frame):
+        """Queue a decoded BGR frame for encoding; frames closer than 1/REPLAY_FPS are skipped."""
+        now = time.monotonic()
+        if self.stopped.is_set() or now - self.last_offer < 1.0 / REPLAY_FPS: return
+        self.last_offer = now
+        self.pending = (now, frame)
+        if self.encoder is None:
+            self.encoder = threading.Thread(target=self._encode_loop, name="xbax-replay-encode", daemon=True)
+            self.encoder.start()
+        self.wake.set()
+
+    def _encode_loop(self):
+        while not self.stopped.is_set():
+            self.wake.wait()
+            self.wake.clear()
+            item, self.pending = self.pending, None
+            if item is None or self.stopped.is_set(): continue
+            ok, jpg = cv2.imencode(".jpg", item[1], [cv2.IMWRITE_JPEG_QUALITY, REPLAY_JPEG_QUALITY])
+            if ok: self.add(jpg.tobytes(), ".jpg", item[0])
+
+    def close(self):
+        """Stop the encoder thread; frames already in the ring stay available to flush()."""
+        self.stopped.set()
+        self.wake.set()
+        if self.encoder is not None:
+            self.encoder.join(timeout=2.0)
+            self.encoder = None
+
+    def flush(self, local_dir=None, on_done=None):
+        """Snapshot the ring and write it on a background thread; returns (dir, frame count)."""
+        with self.lock: frames = list(self.frames)
+        path = os.path.abspath(os.path.expanduser(local_dir) if local_dir else
+                               f"replay-{self.label}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        if frames: threading.Thread(target=self._write, args=(path, frames, on_done), daemon=True).start()
+        return path, len(frames)
+
+    @staticmethod
+    def _write(path, frames, on_done):
+        try:
+            os.makedirs(path, exist_ok=True)
+            t0 = frames[0][0]
+            index = []
+            for i, (ts, wall, ext, data) in enumerate(frames):
+                name = f"frame_{i:05d}{ext}"
+                with open(os.path.join(path, name), "wb") as f: f.write(data)
+                index.append({"file": name, "t": round(ts - t0, 4), "wall": round(wall, 4)})
+            with open(os.path.join(path, "index.json"), "w") as f: json.dump(index, f, indent=1)
+        except OSError as exc:
+            if on_done: on_done(path, 0, exc)
+            return
+        if on_done: on_done(path, len(frames), None)
+
+class VideoStats:
+    """Per-stage timings of the video path, for the F10 HUD and the XBAX_VIDEO_STATS log.
+
+    Workers report read (RTSP read() / IMG round trip), decode and scale time per frame; the
+    UI reports frame age at presentation and blit time. Frames decoded but superseded before
+    the UI picked them up, and IMG responses discarded as out of order, count as dropped.
+    With a log path, one CSV row or JSON line is written per presented frame."""
+    STAGES = ("read", "decode", "scale", "age", "blit")
+    FIELDS = ("wall", "mode", "seq", "read_ms", "decode_ms", "scale_ms", "age_ms", "blit_ms", "dropped")
+
+    def __init__(self, log_path=None):
+        self.lock = threading.Lock()
+        self.samples = {k: collections.deque(maxlen=240) for k in self.STAGES}
+        self.timings = collections.OrderedDict()  # seq -> (read, decode, scale) awaiting presentation
+        self.decoded_at = collections.deque(maxlen=240)
+        self.shown_at = collections.deque(maxlen=240)
+        self.decoded = self.shown = self.dropped = 0
+        self.last = (None, 0)  # (stream, seq) last presented
+        self.log = None
+        self.log_error = None  # why log_path could not be opened; the caller reports it
+        if log_path:
+            try: self.log = open(log_path, "w", newline="")
+            except OSError as exc:
+                self.log_error = str(exc)
+                return
+            self.csv = log_path.lower().endswith(".csv")
+            if self.csv: self.log.write(",".join(self.FIELDS) + "\n")
+
+    def on_decoded(self, seq, read_s, decode_s, scale_s):
+        with self.lock:
+            self.decoded += 1
+            self.decoded_at.append(time.monotonic())
+            self.timings[seq] = (read_s, decode_s, scale_s)
+            while len(self.timings) > 32: self.timings.popitem(last=False)
+
+    def on_discarded(self):
+        with self.lock: self.dropped += 1
+
+    def on_presented(self, stream, mode, seq, frame_time, blit_s):
+        """Called by the UI for each newly displayed frame."""
+        now = time.monotonic()
+        with self.lock:
+            last_stream, last_seq = self.last
+            skipped = seq - last_seq - 1 if stream is last_stream and seq > last_seq else 0
+            self.last = (stream, seq)
+            self.shown += 1
+            self.dropped += max(0, skipped)
+            self.shown_at.append(now)
+            read_s, decode_s, scale_s = self.timings.pop(seq, (0.0, 0.0, 0.0))
+            row = (read_s, decode_s, scale_s, now - frame_time, blit_s)
+            for stage, value in zip(self.STAGES, row): self.samples[stage].append(value * 1000.0)
+        if self.log:
+            record = dict(zip(self.FIELDS, (round(time.time(), 4), mode, seq, *(round(v * 1000.0, 3) for v in row), skipped)))
+            try:
+                if self.csv: self.log.write(",".join(str(record[f]) for f in self.FIELDS) + "\n")
+                else: self.log.write(json.dumps(record) + "\n")
+            except (OSError, ValueError): self.log = None
+
+    @staticmethod
+    def _rate(stamps, now, window=2.0):
+        return sum(1 for t in stamps if now - t <= window) / window
+
+    def summary(self):
+        now = time.monotonic()
+        with self.lock:
+            out = {"decoded_fps": self._rate(self.decoded_at, now), "shown_fps": self._rate(self.shown_at, now),
+                   "decoded": self.decoded, "shown": self.shown, "dropped": self.dropped}
+            for stage, values in self.samples.items():
+                ordered = sorted(values)
+                out[stage] = (sum(ordered) / len(ordered), ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]) if ordered else (0.0, 0.0)
+        return out
+
+    def lines(self, mode):
+        s = self.summary()
+        total = max(1, s["shown"] + s["dropped"])
+        return [
+            f"{mode}  shown {s['shown_fps']:.1f} fps / decoded {s['decoded_fps']:.1f} fps",
+            f"dropped {s['dropped']} of {total} ({100.0 * s['dropped'] / total:.1f}%)",
+            *(f"{stage:<6} avg {s[stage][0]:6.1f} ms   p95 {s[stage][1]:6.1f} ms" for stage in self.STAGES),
+        ]
+
+    def close(self):
+        if self.log:
+            try: self.log.close()
+            except OSError: pass
+            self.log = None
+
+class FrameWriter:
+    """Writes captured BGR frames to disk from a bounded thread pool.
+
+    png/jpg write one image per frame (OpenCV releases the GIL while encoding); npy copies
+    frames into a single memory-mapped frames.npy sized for the whole run, which is trimmed to
+    the frames actually captured on close(). submit() blocks once `workers * 2` frames are
+    queued, so a slow disk throttles the capture loop instead of growing memory."""
+    FORMATS = ("png", "jpg", "npy")
+
+    def __init__(self, out_dir, fmt="png", workers=4, capacity=0):
+        self.out_dir, self.fmt, self.capacity = out_dir, fmt, capacity
+        os.makedirs(out_dir, exist_ok=True)
+        self.pool = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix="xbax-capture")
+        self.slots = threading.Semaphore(workers * 2)
+        self.index = []
+        self.errors = []
+        self.dropped = 0  # stream frames published between two captured ones and never seen
+        self.mm = None
+        self.mm_path = os.path.join(out_dir, "frames.npy")
+
+    def full(self):
+        """Whether npy's pre-sized frames.npy has no slot left for another frame."""
+        return self.fmt == "npy" and len(self.index) >= self.capacity
+
+    def submit(self, frame, seq, t, skipped=0):
+        i = len(self.index)
+        self.dropped += skipped
+        if self.fmt == "npy":
+            if self.mm is None:
+                self.mm = np.lib.format.open_memmap(self.mm_path, mode="w+", dtype=np.uint8, shape=(self.capacity, *frame.shape))
+            if i >= self.capacity or frame.shape != self.mm.shape[1:]:
+                self.errors.append(f"frame {seq}: {'capacity reached' if i >= self.capacity else 'resolution changed'}")
+                return False
+        self.index.append({"frame": i, "seq": seq, "t": round(t, 4), "skipped": skipped})
+        self.slots.acquire()
+        self.pool.submit(self._write, i, frame).add_done_callback(lambda _: self.slots.release())
+        return True
+
+    def _write(self, i, frame):
+        try:
+            if self.mm is not None:
+                self.mm[i] = frame
+            else:
+                params = [cv2.IMWRITE_JPEG_QUALITY, 95] if self.fmt == "jpg" else [cv2.IMWRITE_PNG_COMPRESSION, 1]
+                if not cv2.imwrite(os.path.join(self.out_dir, f"frame_{i:06d}.{self.fmt}"), frame, params):
+                    raise OSError("imwrite failed")
+        except (OSError, cv2.error) as exc:
+            self.errors.append(f"frame {i}: {exc}")
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        if self.mm is not None:
+            count = len(self.index)
+            self.mm.flush()
+            offset, frame_bytes = self.mm.offset, int(np.prod(self.mm.shape[1:]))
+            shape = (count, *self.mm.shape[1:])
+            del self.mm
+            self.mm = None
+            _truncate_npy(self.mm_path, offset, shape, offset + count * frame_bytes)
+        with open(os.path.join(self.out_dir, "index.json"), "w") as f:
+            json.dump({"format": self.fmt, "dropped": self.dropped, "frames": self.index, "errors": self.errors}, f, indent=1)
+        return len(self.index)
+
+def _truncate_npy(path, offset, shape, size):
+    """Rewrite a uint8 .npy header for a smaller leading dimension, in place, and cut the file."""
+    header = str({"descr": "|u1", "fortran_order": False, "shape": shape}).encode("latin1")
+    with open(path, "r+b") as f:
+        magic = f.read(8)
+        width = 2 if magic[6] == 1 else 4
+        f.seek(8 + width)
+        f.write(header.ljust(offset - 8 - width - 1) + b"\n")
+        f.truncate(size)
+
+class FrameBus:
+    """Publishes decoded frames into a shared-memory ring for local reader processes.
+
+    Layout, little endian. Header (64 bytes): magic b"XBAXFBUS", u32 version, u32 slot count,
+    u64 slot capacity in bytes, u64 latest seq, u32 latest slot, u32 open flag. Then each slot:
+    a 64-byte slot header (u64 seq_begin, u32 width, u32 height, u32 channels, u32 row stride,
+    f64 wall-clock time, f64 monotonic time, u64 seq_end) followed by the BGR pixels, row-major.
+    The writer stores seq_begin, then pixels, then seq_end; a reader that sees them differ
+    caught the slot mid-write. A slot is reused only after `slots - 1` newer frames, so readers
+    may work on a zero-copy view for that long. The segment is sized on the first frame and
+    recreated (open flag cleared first) if a larger frame arrives."""
+    MAGIC = b"XBAXFBUS"
+    VERSION = 1
+    HEADER = struct.Struct("<8sIIQQII24x")
+    SLOT = struct.Struct("<QIIIIddQ16x")
+
+    def __init__(self, name, slots=FRAME_BUS_SLOTS):
+        self.name, self.slots = name, slots
+        self.shm = None
+        self.capacity = 0
+        self.next_slot = 0
+        self.lock = threading.Lock()
+
+    def _create(self, capacity):
+        self.close()
+        size = self.HEADER.size + self.slots * (self.SLOT.size + capacity)
+        try:
+            self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:  # left behind by a crashed session
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        self.capacity = capacity
+        self.HEADER.pack_into(self.shm.buf, 0, self.MAGIC, self.VERSION, self.slots, capacity, 0, 0, 1)
+
+    def publish(self, frame, seq):
+        if not isinstance(frame, np.ndarray):  # IMG surface: one strided copy out of pixels3d, RGB->BGR
+            try: frame = pygame.surfarray.pixels3d(frame)
+            except ValueError: frame = pygame.surfarray.array3d(frame)  # palettized PNG
+            frame = frame.transpose(1, 0, 2)[..., ::-1]
+        h, w, c = frame.shape
+        with self.lock:
+            if frame.nbytes > self.capacity: self._create(frame.nbytes)
+            slot = self.next_slot
+            self.next_slot = (slot + 1) % self.slots
+            off = self.HEADER.size + slot * (self.SLOT.size + self.capacity)
+            buf = self.shm.buf
+            struct.pack_into("<Q", buf, off, seq)
+            dst = np.ndarray((h, w, c), np.uint8, buf, off + self.SLOT.size)
+            np.copyto(dst, frame)
+            del dst
+            self.SLOT.pack_into(buf, off, seq, w, h, c, w * c, time.time(), time.monotonic(), seq)
+            struct.pack_into("<QI", buf, 24, seq, slot)
+
+    def close(self):
+        if self.shm is None: return
+        try:
+            struct.pack_into("<I", self.shm.buf, 36, 0)
+            self.shm.close()
+            self.shm.unlink()
+        except (OSError, BufferError): pass
+        self.shm = None
+
+class FrameBusReader:
+    """Attaches to a FrameBus from another process: FrameBusReader(name).latest()."""
+    def __init__(self, name):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)  # 3.13+
+        except TypeError:
+            # Older versions register the segment for unlink at our exit; only the writer owns it
+            self.shm = shared_memory.SharedMemory(name=name)
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except (ImportError, AttributeError, KeyError): pass
+        magic, version, self.slots, self.capacity, _, _, _ = FrameBus.HEADER.unpack_from(self.shm.buf, 0)
+        if magic != FrameBus.MAGIC or version != FrameBus.VERSION:
+            self.close()
+            raise ValueError(f"{name} is not an xbax frame bus")
+
+    @property
+    def is_open(self):
+        return FrameBus.HEADER.unpack_from(self.shm.buf, 0)[6] == 1
+
+    def _slot_offset(self, slot):
+        return FrameBus.HEADER.size + slot * (FrameBus.SLOT.size + self.capacity)
+
+    def latest(self, copy=True):
+        """(seq, wall time, HxWx3 BGR array) of the newest frame, or (0, 0.0, None) before the
+        first one. With copy=False the array is a view into shared memory; check it with
+        still_valid(seq) after use."""
+        for _ in range(3):
+            seq, slot = struct.unpack_from("<QI", self.shm.buf, 24)
+            if not seq: return 0, 0.0, None
+            off = self._slot_offset(slot)
+            begin, w, h, c, stride, wall, _, end = FrameBus.SLOT.unpack_from(self.shm.buf, off)
+            if begin != end: continue  # mid-write
+            view = np.ndarray((h, w, c), np.uint8, self.shm.buf, off + FrameBus.SLOT.size, (stride, c, 1))
+            frame = view.copy() if copy else view
+            if struct.unpack_from("<Q", self.shm.buf, off)[0] == begin:
+                return begin, wall, frame
+        return 0, 0.0, None
+
+    def still_valid(self, seq):
+        for slot in range(self.slots):
+            off = self._slot_offset(slot)
+            if struct.unpack_from("<Q", self.shm.buf, off)[0] == seq:
+                return FrameBus.SLOT.unpack_from(self.shm.buf, off)[7] == seq
+        return False
+
+    def close(self):
+        try: self.shm.close()
+        except BufferError: pass  # a zero-copy view is still alive
+
+class MjpegServer:
+    """Re-serves the active stream over HTTP: /stream.mjpg (multipart MJPEG), /latest.jpg and a
+    viewer page at /.
+
+    Frames are JPEG-encoded once, whatever the viewer count, on one encoder thread that takes the
+    newest frame, at up to MJPEG_FPS while someone watches and MJPEG_IDLE_FPS otherwise so
+    /latest.jpg stays fresh. Each viewer sends the newest encoded frame whenever its socket is
+    ready for one, so a slow client skips frames instead of queueing them."""
+    PAGE = (b"<!doctype html><title>Xbox Devkit</title><body style='margin:0;background:#111'>"
+            b"<img src='/stream.mjpg' style='width:100vw;height:100vh;object-fit:contain'></body>")
+
+    def __init__(self):
+        self.httpd = None
+        self.port = None
+        self.cond = threading.Condition()
+        self.jpeg, self.seq = None, 0
+        self.viewers = 0
+        self.pending = None
+        self.wake = threading.Event()
+        self.last_offer = 0.0
+
+    def start(self, port=MJPEG_DEFAULT_PORT, host="0.0.0.0"):
+        if self.httpd: return self.port
+        httpd = http.server.ThreadingHTTPServer((host, port), self._handler_class())
+        httpd.daemon_threads = True
+        self.httpd, self.port = httpd, httpd.server_address[1]
+        threading.Thread(target=httpd.serve_forever, name="xbax-mjpeg", daemon=True).start()
+        threading.Thread(target=self._encode_loop, args=(httpd,), name="xbax-mjpeg-encode", daemon=True).start()
+        return self.port
+
+    def stop(self):
+        httpd, self.httpd = self.httpd, None
+        if httpd:
+            httpd.shutdown()
+            httpd.server_close()
+        self.wake.set()
+        with self.cond: self.cond.notify_all()
+
+    def offer(self, frame):
+        if not self.httpd: return
+        now = time.monotonic()
+        if now - self.last_offer < 1.0 / (MJPEG_FPS if self.viewers else MJPEG_IDLE_FPS): return
+        self.last_offer = now
+        if not isinstance(frame, np.ndarray):  # IMG surface: copy out now, before the UI can blit it
+            try: rgb = pygame.surfarray.pixels3d(frame)
+            except ValueError: rgb = pygame.surfarray.array3d(frame)
+            frame = np.ascontiguousarray(rgb.transpose(1, 0, 2)[..., ::-1])
+            del rgb
+        self.pending = frame
+        self.wake.set()
+
+    def _encode_loop(self, httpd):
+        while self.httpd is httpd:
+            self.wake.wait()
+            self.wake.clear()
+            frame, self.pending = self.pending, None
+            if frame is None: continue
+            ok, jpg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, MJPEG_QUALITY])
+            if not ok: continue
+            with self.cond:
+                self.jpeg, self.seq = jpg.tobytes(), self.seq + 1
+                self.cond.notify_all()
+
+    def next_frame(self, after, timeout=1.0):
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq > after or not self.httpd, timeout)
+            return self.seq, self.jpeg
+
+    def _handler_class(server):
+        class Handler(http.server.BaseHTTPRequestHandler):
+            timeout = MJPEG_CLIENT_TIMEOUT  # a viewer that stops reading is dropped
+
+            def log_message(self, *args): pass
+
+            def _send(self, ctype, body):
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path in ("/", "/index.html"): return self._send("text/html", server.PAGE)
+                if path == "/latest.jpg":
+                    _, jpeg = server.next_frame(0)
+                    if jpeg is None: return self.send_error(503, "no frame yet")
+                    return self._send("image/jpeg", jpeg)
+                if path != "/stream.mjpg": return self.send_error(404)
+                self.send_response(200)
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.send_header("Cache-Control", "no-store")
+                self.end_headers()
+                with server.cond: server.viewers += 1
+                try:
+                    sent = 0
+                    while server.httpd:
+                        seq, jpeg = server.next_frame(sent)
+                        if seq == sent or jpeg is None: continue
+                        self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n" % len(jpeg)
+                                         + jpeg + b"\r\n")
+                        sent = seq
+                except OSError: pass
+                finally:
+                    with server.cond: server.viewers -= 1
+        return Handler
+
+def transport_score(m):
+    """Frames per second a transport can actually put on screen: 0 when stalled, else
+    delivered fps capped by what its client-side decode cost allows."""
+    if m["age"] is None or m["age"] > VIDEO_STALL_TIMEOUT: return 0.0
+    if m["decode_ms"]: return min(m["fps"], 1000.0 / m["decode_ms"])
+    return m["fps"]
+
+class TransportSelector:
+    """Keeps run_stream on whichever of RTSP and IMG currently performs better.
+
+    The active stream is scored every tick. The other transport is probed in the background
+    for TRANSPORT_PROBE_WINDOW seconds when the active one is degraded, and periodically while
+    on IMG; both wait for next_probe, which backs off after every probe that fails or loses
+    and resets only on a switch. A switch needs the candidate to beat the active score by TRANSPORT_SWITCH_MARGIN,
+    and none happens within TRANSPORT_MIN_DWELL of the last one. F8 pins a transport for
+    TRANSPORT_MANUAL_HOLD. `reason` says why the current transport was chosen."""
+    STREAMS = {"RTSP": lambda ip: FastVideoStream(ip), "IMG": lambda ip: IMGVideoStream(ip)}
+
+    def __init__(self, ip, video, mode, reason):
+        self.ip = ip
+        self.video, self.mode, self.reason = video, mode, reason
+        self.lock = threading.Lock()
+        self.candidate = None      # (mode, stream, probe start) once a probe stream is up
+        self.probing = False
+        self.stopped_probe = False
+        self.last_switch = time.monotonic()
+        self.manual_until = 0.0
+        self.degraded_since = None
+        self.probe_interval = TRANSPORT_PROBE_INTERVAL
+        self.next_probe = time.monotonic() + self.probe_interval
+
+    def other(self, mode=None):
+        return "IMG" if (mode or self.mode) == "RTSP" else "RTSP"
+
+    def manual(self):
+        """F8: switch to the other transport and hold it."""
+        self._drop_candidate()
+        self.video.stop()
+        self.mode = self.other()
+        old, self.video = self.video, self.STREAMS[self.mode](self.ip)
+        self._adopt(old, self.video)
+        self.video.start()
+        self.reason = "manual (F8)"
+        self.last_switch = time.monotonic()
+        self.manual_until = self.last_switch + TRANSPORT_MANUAL_HOLD
+
+    @staticmethod
+    def _adopt(old, new):
+        """Hand the session-wide replay ring and stats over to the newly active stream."""
+        new.replay, new.stats, new.bus, new.mjpeg = old.replay, old.stats, old.bus, old.mjpeg
+
+    def _probe(self, mode, target_size):
+        try:
+            stream = self.STREAMS[mode](self.ip)
+            if mode == "RTSP" and not stream.grabbed:
+                stream.stop()
+                stream = None
+        except Exception: stream = None
+        with self.lock:
+            self.probing = False
+            if stream is None or self.stopped_probe:
+                if stream: stream.stop()
+                self._probe_failed()
+                return
+            stream.set_target(target_size)
+            self.candidate = (mode, stream.start(), time.monotonic())
+
+    def _probe_failed(self):
+        self.probe_interval = min(self.probe_interval * 2, TRANSPORT_PROBE_MAX_INTERVAL)
+        self.next_probe = time.monotonic() + self.probe_interval
+
+    def _drop_candidate(self):
+        with self.lock:
+            self.stopped_probe = True
+            if self.candidate: self.candidate[1].stop()
+            self.candidate = None
+
+    def tick(self):
+        """Called once per UI frame; returns True when the active stream was replaced."""
+        now = time.monotonic()
+        active = transport_score(self.video.metrics())
+        degraded = active < TRANSPORT_DEGRADED_FPS and now - self.video.started > VIDEO_STALL_TIMEOUT
+        self.degraded_since = (self.degraded_since or now) if degraded else None
+
+        with self.lock: candidate, probing = self.candidate, self.probing
+        if candidate is None:
+            if probing or now < self.manual_until or now - self.last_switch < TRANSPORT_MIN_DWELL: return False
+            if now < self.next_probe: return False  # failed/losing probes back off up to TRANSPORT_PROBE_MAX_INTERVAL
+            if self.mode == "IMG" or (self.degraded_since and now - self.degraded_since >= TRANSPORT_DEGRADED_HOLD):
+                self.probing, self.stopped_probe = True, False
+                threading.Thread(target=self._probe, args=(self.other(), self.video.buffers.target_size), daemon=True).start()
+            return False
+
+        mode, stream, started = candidate
+        if now - started < TRANSPORT_PROBE_WINDOW: return False
+        score = transport_score(stream.metrics(TRANSPORT_PROBE_WINDOW))
+        with self.lock: self.candidate = None
+        if score <= max(active * TRANSPORT_SWITCH_MARGIN, active + 1.0):
+            stream.stop()
+            self._probe_failed()
+            return False
+        self.reason = (f"auto: {self.mode} stalled" if active <= 0 else
+                       f"auto: {mode} {score:.0f} fps vs {self.mode} {active:.0f} fps")
+        self.video.stop()
+        self._adopt(self.video, stream)
+        self.video, self.mode = stream, mode
+        self.last_switch = now
+        self.degraded_since = None
+        self.probe_interval = TRANSPORT_PROBE_INTERVAL
+        self.next_probe = now + self.probe_interval
+        return True
+
+    def stop(self):
+        self._drop_candidate()
+        self.video.stop()
 
 class XboxInputClient:
-    def __init__(self, ip):
+    """Streams key and mouse packets to the console's remoteinput websocket.
+
+    Packets wait in a Condition-guarded FIFO, so the sender thread sleeps until
+    something is enqueued instead of polling. Mouse moves coalesce into the latest
+    position, which is flushed ahead of any later key/button packet so transitions
+    reach the console in the order they happened.
+
+    A supervisor thread reconnects with jittered exponential backoff. Input that
+    arrives while disconnected follows the stale policy: "drop" discards it,
+    "releases" keeps only key/button releases so nothing stays held down after the
+    console's remoteinput service restarts. on_state(state, detail) is called on
+    each connecting/connected/reconnecting transition."""
+    POLICIES = ("drop", "releases")
+
+    def __init__(self, ip, policy=None):
+        self.ip = ip
         self.url = f"wss://{ip}:11443/ext/remoteinput"
         self.ws = None
         self.connected = False
-        self.queue = queue.Queue()
-        self.mouse_pos = None
+        self.stopped = False
+        self.wake = threading.Event()
+        self.state = "connecting"
+        self.reconnects = 0
+        self.opened_at = 0.0
+        self.on_state = None
+        policy = (policy or os.environ.get(INPUT_STALE_ENV, "") or INPUT_STALE_POLICY).strip().lower()
+        self.policy = policy if policy in self.POLICIES else INPUT_STALE_POLICY
+        self.dropped = 0
+        self.cond = threading.Condition()
+        self.pending = collections.deque()  # (enqueued_at, packet)
+        self.mouse_pos = None               # latest move not yet handed to the sender
+        self.mouse_at = 0.0
         self.last_mouse = None
+        self.sent = self.coalesced = self.max_depth = 0
+        self.latency = collections.deque(maxlen=240)  # enqueue -> sent, ms
+        self.recorder = None
+        self.last_sent = (None, 0.0, 0.0)  # (packet, monotonic before ws.send, after)
         threading.Thread(target=self._run, daemon=True).start()
         threading.Thread(target=self._process, daemon=True).start()
 
     def _run(self):
-        while True:
-            try:
-                self.ws = websocket.WebSocketApp(self.url, on_open=self._open, on_error=lambda w,e: None)
-                self.ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
-            except: time.sleep(2)
-
-    def _open(self, ws): self.connected = True
+        backoff = INPUT_RECONNECT_MIN
+        while not self.stopped:
+            self.ws = websocket.WebSocketApp(self.url, on_open=self._open, on_error=lambda w,e: None)
+            attempt = time.monotonic()
+            try: self.ws.run_forever(sslopt={"cert_reqs": ssl.CERT_NONE})
+            except Exception: pass
+            # Judge stability from when this session opened: a failed send has already
+            # cleared `connected` by the time run_forever returns.
+            if self.opened_at >= attempt and time.monotonic() - self.opened_at >= INPUT_STABLE_AFTER: backoff = INPUT_RECONNECT_MIN
+            with self.cond:
+                self.connected = False
+                self.mouse_pos = None
+                self._apply_policy_locked()
+            if self.stopped: break
+            delay = random.uniform(backoff / 2, backoff)
+            self._set_state("reconnecting" if self.opened_at else "connecting", f"retrying in {delay:.1f}s")
+            if self.wake.wait(delay): break
+            backoff = min(backoff * 2, INPUT_RECONNECT_MAX)
+            self.reconnects += 1
+
+    def _open(self, ws):
+        self.opened_at = time.monotonic()
+        with self.cond:
+            self.connected = True
+            self.last_mouse = None
+            held = len(self.pending)
+            self.cond.notify()
+        self._set_state("connected", f"sending {held} held release(s)" if held else "")
+
+    def _set_state(self, state, detail=""):
+        if state == self.state: return
+        self.state = state
+        if self.on_state:
+            try: self.on_state(state, detail)
+            except Exception: pass
+
+    @staticmethod
+    def _is_release(packet):
+        if packet[0] == 0x01: return packet[2] == 0
+        return struct.unpack('!H', packet[1:3])[0] in (L_UP, M_UP, R_UP)
+
+    def _apply_policy_locked(self):
+        kept = collections.deque()
+        if self.policy == "releases":
+            seen = set()
+            for queued_at, p in self.pending:
+                if self._is_release(p) and p not in seen:
+                    seen.add(p)
+                    kept.append((queued_at, p))
+        self.dropped += len(self.pending) - len(kept)
+        self.pending = kept
+
+    def _flush_move_locked(self):
+        if self.mouse_pos is None: return
+        x, y = self.mouse_pos
+        self.pending.append((self.mouse_at, struct.pack('!B H I I', 0x03, MOUSE_MOVE, x, y)))
+        self.last_mouse, self.mouse_pos = self.mouse_pos, None
+
+    def _enqueue(self, packet):
+        with self.cond:
+            if not self.connected:
+                if self.policy == "releases" and self._is_release(packet) and all(p != packet for _, p in self.pending):
+                    self.pending.append((time.perf_counter(), packet))
+                else: self.dropped += 1
+                return
+            self._flush_move_locked()
+            self.pending.append((time.perf_counter(), packet))
+            self.max_depth = max(self.max_depth, len(self.pending))
+            self.cond.notify()
 
     def _process(self):
         while True:
-            while not self.queue.empty():
-                p = self.queue.get()
-                if self.connected and self.ws:
-                    try: self.ws.send(p, opcode=websocket.ABNF.OPCODE_BINARY)
-                    except: pass
-                self.queue.task_done()
-            if self.mouse_pos and self.mouse_pos != self.last_mouse:
-                if self.connected and self.ws:
-                    x, y = self.mouse_pos
-                    p = struct.pack('!B H I I', 0x03, MOUSE_MOVE, x, y)
-                    try: self.ws.send(p, opcode=websocket.ABNF.OPCODE_BINARY); self.last_mouse = self.mouse_pos
-                    except: pass
-            time.sleep(0.008)
-
-    def send_key(self, key, down):
+            with self.cond:
+                while not self.stopped and not (self.connected and (self.pending or self.mouse_pos is not None)): self.cond.wait()
+                if self.stopped: return
+                self._flush_move_locked()
+                batch = list(self.pending)
+                self.pending.clear()
+            for i, (queued_at, p) in enumerate(batch):
+                send_at = time.monotonic()
+                try: self.ws.send(p, opcode=websocket.ABNF.OPCODE_BINARY)
+                except Exception:
+                    # Socket died mid-batch: hold the rest under the stale policy and
+                    # make the supervisor cycle the connection.
+                    with self.cond:
+                        self.connected = False
+                        self.pending.extendleft(reversed(batch[i:]))
+                        self._apply_policy_locked()
+                    try: self.ws.close()
+                    except Exception: pass
+                    break
+                with self.cond:
+                    self.last_sent = (p, send_at, time.monotonic())
+                    self.sent += 1
+                    self.latency.append((time.perf_counter() - queued_at) * 1000.0)
+                    if self.recorder: self.recorder.write(p, time.perf_counter_ns())
+
+    @staticmethod
+    def key_packet(key, down):
+        """0x01 key frame for a pygame key code, or None if the key has no VK mapping."""
         vk = VK_MAP.get(key)
         if vk is None:
             if 97 <= key <= 122: vk = key - 32
             elif 48 <= key <= 57: vk = key
-            else: return
-        self.queue.put(bytearray([0x01, vk, 1 if down else 0]))
+            else: return None
+        return bytes([0x01, vk, 1 if down else 0])
+
+    def send_key(self, key, down):
+        p = self.key_packet(key, down)
+        if p: self._enqueue(p)
 
     def send_mouse(self, action, x, y, wheel=0):
         p = struct.pack('!B H I I', 0x03, action, x, y)
         if action == WHEEL_V: p += struct.pack('!I', wheel & 0xFFFFFFFF)
-        self.queue.put(p)
+        self._enqueue(p)
+
+    def update_mouse(self, x, y):
+        with self.cond:
+            if not self.connected: return
+            if (x, y) == (self.mouse_pos or self.last_mouse): return
+            if self.mouse_pos is None: self.mouse_at = time.perf_counter()
+            else: self.coalesced += 1
+            self.mouse_pos = (x, y)
+            self.cond.notify()
+
+    def stats(self):
+        with self.cond:
+            ordered = sorted(self.latency)
+            return {"depth": len(self.pending) + (self.mouse_pos is not None), "max_depth": self.max_depth,
+                    "sent": self.sent, "coalesced": self.coalesced, "dropped": self.dropped,
+                    "latency": (sum(ordered) / len(ordered), ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]) if ordered else (0.0, 0.0)}
+
+    def lines(self):
+        s = self.stats()
+        return [
+            f"input  avg {s['latency'][0]:6.1f} ms   p95 {s['latency'][1]:6.1f} ms",
+            f"input queue {s['depth']} (max {s['max_depth']}) • sent {s['sent']} • coalesced {s['coalesced']} • dropped {s['dropped']}",
+        ]
+
+    def send_raw(self, packet):
+        """Sends immediately on the caller's thread, bypassing the queue; False if offline."""
+        ws = self.ws
+        if not (self.connected and ws): return False
+        try:
+            ws.send(packet, opcode=websocket.ABNF.OPCODE_BINARY)
+            return True
+        except Exception: return False
+
+    def start_recording(self, path):
+        recorder = InputRecorder(path)
+        with self.cond: old, self.recorder = self.recorder, recorder
+        if old: old.close()
+        return recorder
+
+    def stop_recording(self):
+        with self.cond: recorder, self.recorder = self.recorder, None
+        if recorder: recorder.close()
+        return recorder
+
+    def stop(self):
+        self.stop_recording()
+        self.stopped = True
+        self.wake.set()
+        with self.cond: self.cond.notify_all()
+        try:
+            if self.ws: self.ws.close()
+        except Exception: pass
+
+class InputRecorder:
+    """Appends sent input packets to a compact binary log.
+
+    Layout: INPUT_LOG_MAGIC, then per packet `<IB` (microseconds since the previous packet,
+    length) followed by the raw 0x01 key / 0x03 mouse frame. Timestamps are perf_counter_ns
+    taken on the sender thread right after each send."""
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(INPUT_LOG_MAGIC)
+        self.last = None
+        self.count = 0
+
+    def write(self, packet, t_ns):
+        delta = 0 if self.last is None else min((t_ns - self.last) // 1000, 0xFFFFFFFF)
+        self.last = t_ns
+        self.file.write(struct.pack('<IB', delta, len(packet)) + bytes(packet))
+        self.count += 1
+
+    def close(self):
+        try: self.file.close()
+        except OSError: pass
+
+def load_input_log(path):
+    """Returns [(offset_s, packet)] from an InputRecorder log."""
+    with open(path, "rb") as f: data = f.read()
+    if not data.startswith(INPUT_LOG_MAGIC): raise ValueError(f"{path} is not an input log")
+    records, pos, t = [], len(INPUT_LOG_MAGIC), 0
+    while pos + 5 <= len(data):
+        delta, size = struct.unpack_from('<IB', data, pos)
+        packet = data[pos + 5:pos + 5 + size]
+        if len(packet) < size: break  # truncated tail from an interrupted recording
+        t += delta
+        records.append((t / 1e6, packet))
+        pos += 5 + size
+    return records
+
+class InputPlayer:
+    """Plays an input log back against a console on its own thread.
+
+    Each packet is scheduled against a perf_counter origin: sleep until INPUT_SPIN_S before
+    the deadline, then spin, so sends land well under a millisecond late independent of the
+    pygame loop. Keys and buttons still down when playback ends or is stopped are released."""
+    RELEASES = {L_DOWN: L_UP, M_DOWN: M_UP, R_DOWN: R_UP}
+
+    def __init__(self, client, path, speed=1.0, repeat=1, on_done=None):
+        self.client, self.path, self.speed, self.repeat, self.on_done = client, path, speed, repeat, on_done
+        self.records = load_input_log(path)
+        self.wake = threading.Event()
+        self.late = []
+        self.sent = 0
+        self.error = None
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
 
-    def update_mouse(self, x, y): self.mouse_pos = (x, y)
+    def stop(self): self.wake.set()
+
+    def run(self):
+        held = {}
+        try:
+            for _ in range(self.repeat):
+                origin = time.perf_counter() + 0.05
+                for offset, packet in self.records:
+                    deadline = origin + offset / self.speed
+                    while True:
+                        left = deadline - time.perf_counter()
+                        if left <= 0: break
+                        if left > INPUT_SPIN_S and self.wake.wait(left - INPUT_SPIN_S): return
+                        if self.wake.is_set(): return
+                    if not self.client.send_raw(packet):
+                        self.error = "remote input is not connected"
+                        return
+                    self.late.append(time.perf_counter() - deadline)
+                    self.sent += 1
+                    self._track(held, packet)
+        finally:
+            for packet in held.values(): self.client.send_raw(packet)
+            if self.on_done: self.on_done(self)
+
+    def _track(self, held, packet):
+        if packet[0] == 0x01 and len(packet) >= 3:
+            if packet[2]: held[(0x01, packet[1])] = bytes([0x01, packet[1], 0])
+            else: held.pop((0x01, packet[1]), None)
+        elif packet[0] == 0x03 and len(packet) >= 11:
+            action = struct.unpack_from('!H', packet, 1)[0]
+            if action in self.RELEASES: held[(0x03, action)] = packet[:1] + struct.pack('!H', self.RELEASES[action]) + packet[3:11]
+            else: held.pop((0x03, next((d for d, u in self.RELEASES.items() if u == action), None)), None)
+
+    def summary(self):
+        if not self.late: return f"{self.sent} packets sent"
+        ordered = sorted(self.late)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000.0
+        return (f"{self.sent} packets sent; lateness p50 {pick(0.5):.3f} ms, p99 {pick(0.99):.3f} ms, "
+                f"max {ordered[-1] * 1000.0:.3f} ms")
+
+class LatencyProbe:
+    """Measures input-to-photon latency on a live session.
+
+    Each trial presses a key through the input client's normal queue, then compares every
+    newly decoded frame against the last one before the press: a strided grayscale crop of
+    the region of interest, cv2.absdiff + mean. Trials are split into client queue, websocket
+    send, console+network (until the responding frame started decoding) and client decode,
+    from XboxInputClient.last_sent and the stream's VideoStats timings. For RTSP the decode
+    segment is the worker's grab()+retrieve() time, which includes any wait for the packet."""
+    SEGMENTS = ("queue", "send", "remote", "decode", "total")
+
+    def __init__(self, client, stream, key, roi=(0.0, 0.0, 1.0, 1.0), threshold=LATENCY_DIFF_THRESHOLD):
+        self.client, self.stream, self.key, self.roi, self.threshold = client, stream, key, roi, threshold
+        self.press = client.key_packet(key, True)
+        if self.press is None: raise ValueError(f"key {key} has no Xbox mapping")
+        self.results = []
+        self.misses = 0
+
+    def _crop(self, frame):
+        h, w = frame.shape[:2]
+        x, y, rw, rh = self.roi
+        crop = frame[int(y * h):max(int(y * h) + 1, int((y + rh) * h)):LATENCY_STRIDE,
+                     int(x * w):max(int(x * w) + 1, int((x + rw) * w)):LATENCY_STRIDE]
+        return cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+
+    def _next_frame(self, after_seq, deadline):
+        while time.monotonic() < deadline:
+            seq, ts, frame = self.stream.latest()
+            if seq > after_seq and frame is not None: return seq, ts, frame
+            time.sleep(0.002)  # frame_time is stamped by the worker, so polling adds no error
+        return None
+
+    def calibrate(self, seconds=1.0):
+        """Raises the threshold above frame-to-frame noise seen with no input; returns that noise."""
+        seq, _, frame = self.stream.latest()
+        if frame is None: return 0.0
+        prev, noise, deadline = self._crop(frame), 0.0, time.monotonic() + seconds
+        while (item := self._next_frame(seq, deadline)):
+            seq, _, frame = item
+            cur = self._crop(frame)
+            noise = max(noise, float(cv2.absdiff(cur, prev).mean()))
+            prev = cur
+        self.threshold = max(self.threshold, noise * 2)
+        return noise
+
+    def trial(self):
+        """One press/release; returns the segment dict (seconds) or None on timeout."""
+        seq, _, frame = self.stream.latest()
+        base = self._crop(frame)
+        t0 = time.monotonic()
+        deadline = t0 + LATENCY_TIMEOUT
+        self.client.send_key(self.key, True)
+        try:
+            while True:
+                item = self._next_frame(seq, deadline)
+                if item is None:
+                    self.misses += 1
+                    return None
+                seq, ts, frame = item
+                if float(cv2.absdiff(self._crop(frame), base).mean()) > self.threshold: break
+            packet, send_at, sent_at = self.client.last_sent
+            if packet != self.press or send_at < t0: send_at = sent_at = t0  # stamp lost; charge it all to remote
+            decode_s = self._client_decode(seq)
+            result = {"queue": send_at - t0, "send": sent_at - send_at, "remote": max(0.0, ts - decode_s - sent_at),
+                      "decode": decode_s, "total": ts - t0}
+            self.results.append(result)
+            return result
+        finally:
+            self.client.send_key(self.key, False)
+
+    def _client_decode(self, seq):
+        """Client-side cost of frame `seq` before it was stamped: IMG's imdecode, or RTSP's
+        grab()+retrieve() (FastVideoStream reports FFmpeg's decode as read time)."""
+        stats = self.stream.stats
+        if not stats: return 0.0
+        deadline = time.monotonic() + 0.1
+        while True:  # latest() shows the seq just before the worker's on_decoded() lands
+            with stats.lock: timing = stats.timings.get(seq)
+            if timing or time.monotonic() > deadline: break
+            time.sleep(0.001)
+        read_s, decode_s, _ = timing or (0.0, 0.0, 0.0)  # scale runs after the stamp
+        return read_s if isinstance(self.stream, FastVideoStream) else decode_s
+
+    def run(self, trials, on_trial=None):
+        interval = 1.0 / max(1.0, self.stream.metrics()["fps"])
+        for i in range(trials):
+            result = self.trial()
+            if on_trial: on_trial(i, result)
+            time.sleep(LATENCY_SETTLE + random.uniform(0.0, interval))  # don't phase-lock to the frame cadence
+        return self.results
+
+    def lines(self):
+        if not self.results: return [f"no responses ({self.misses} timed out)"]
+        out = [f"{len(self.results)} trials, {self.misses} timed out, threshold {self.threshold:.1f}"]
+        for seg in self.SEGMENTS:
+            ordered = sorted(r[seg] * 1000.0 for r in self.results)
+            pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+            out.append(f"{seg:<6} p50 {pick(0.5):7.1f} ms   p95 {pick(0.95):7.1f} ms   p99 {pick(0.99):7.1f} ms")
+        return out
 
 def get_xbox_coords(mx, my, active_rect):
     vx, vy, vw, vh = active_rect
@@ -3900,8 +6122,7 @@ def fetch_dev_credentials(ip, timeout=5):
     because the devkit ships a self-signed certificate.
     """
     try:
-        res = requests.get(f"https://{ip}:11443/ext/smb/developerfolder",
-                           verify=False, timeout=timeout)
+        res = devkit_http.get(ip, "/ext/smb/developerfolder", timeout=timeout)
         res.raise_for_status()
         data = res.json()
         return data.get("Username"), data.get("Password")
@@ -3949,15 +6170,57 @@ def run_menu(screen, clock):
     font_small = ui_font(20)
     font_label = ui_font(16, bold=True)
     consoles = []
+    cached = load_discovery_cache()
     scanning = True
     backdrop = build_backdrop(MENU_SIZE)
+    list_rect = pygame.Rect(0, 0, 0, 0)
+    listed = set()
 
     def done():
         nonlocal scanning
         scanning = False
 
-    threading.Thread(target=scan_network_async, args=(consoles, done), daemon=True).start()
+    def menu_entries():
+        # Confirmed consoles first, then cached ones. Cached consoles stay
+        # listed (and clickable) while the scan runs so a kit used minutes ago
+        # is one click away; afterwards only while the monitor still sees them.
+        confirmed = list(consoles)
+        entries = list(confirmed)
+        known = {ip for ip, _ in confirmed}
+        for e in cached:
+            if e["ip"] not in known and (scanning or devkit_monitor.status(e["ip"])["state"] == "online"):
+                entries.append((e["ip"], e.get("hostname") or "Xbox Devkit"))
+        return entries
+
+    def entry_button(i, ip, name):
+        x, y, w = list_rect.x + 20, list_rect.y + 94 + i*64, list_rect.width - 40
+        status = devkit_monitor.status(ip)
+        label = f"{name}   ({ip})   • {status['label']}"
+        if status["state"] == "online":
+            return Button(x, y, w, 52, label, (39, 139, 101), (58, 170, 122))
+        if status["state"] == "offline":
+            return Button(x, y, w, 52, label, (132, 64, 70), (166, 82, 90))
+        return Button(x, y, w, 52, label, (59, 89, 133), (82, 115, 169))
+
+    def relist(entries, keep=()):
+        # Stop polling consoles that dropped out of the list (or every one
+        # but `keep` when the menu closes); run_stream tracks its own ip.
+        nonlocal listed
+        now_listed = {ip for ip, _ in entries}
+        for ip in listed - now_listed - set(keep):
+            devkit_monitor.forget(ip)
+        listed = now_listed
+
+    def start_scan():
+        for e in cached:
+            devkit_monitor.track(e["ip"], e.get("hostname"))
+        threading.Thread(target=scan_network_async,
+                         args=(consoles, done, lambda res: devkit_monitor.track(*res)),
+                         daemon=True).start()
+
+    start_scan()
     refresh_btn = Button(MENU_SIZE[0]//2 - 130, MENU_SIZE[1] - 96, 260, 48, "Refresh Discovery", (63, 126, 214), (86, 155, 245))
+    wall_btn = Button(refresh_btn.rect.right + 16, MENU_SIZE[1] - 96, 200, 48, "Video Wall", (76, 99, 189), (103, 129, 230))
 
     running = True
     while running:
@@ -3967,6 +6230,7 @@ def run_menu(screen, clock):
             backdrop = build_backdrop(MENU_SIZE)
             refresh_btn.rect.x = MENU_SIZE[0]//2 - refresh_btn.rect.w//2
             refresh_btn.rect.y = MENU_SIZE[1] - 96
+            wall_btn.rect.x, wall_btn.rect.y = refresh_btn.rect.right + 16, refresh_btn.rect.y
 
         screen.blit(backdrop, (0, 0))
 
@@ -3982,7 +6246,10 @@ def run_menu(screen, clock):
         )
         screen.blit(subtitle, (hero_rect.x + 30, hero_rect.y + 94))
 
-        status_text = "Scanning the local network for Dev Mode consoles..." if scanning else f"{len(consoles)} console(s) discovered"
+        if scanning and consoles:
+            status_text = f"{len(consoles)} console(s) confirmed, sweeping the LAN for new ones..."
+        else:
+            status_text = "Scanning the local network for Dev Mode consoles..." if scanning else f"{len(consoles)} console(s) discovered"
         status_color = UI_COLORS["warning"] if scanning else (UI_COLORS["success"] if consoles else UI_COLORS["danger"])
         draw_status_chip(screen, hero_rect.x + 30, hero_rect.y + 132, status_text, status_color)
 
@@ -3990,37 +6257,44 @@ def run_menu(screen, clock):
         draw_panel(screen, list_rect, UI_COLORS["panel_alt"], UI_COLORS["panel_border"], radius=22)
         screen.blit(font_label.render("Available Consoles", True, UI_COLORS["text"]), (list_rect.x + 20, list_rect.y + 18))
 
-        if scanning:
-            txt = font_small.render("Waiting for Dev Mode consoles to answer on port 11443...", True, UI_COLORS["muted"])
+        entries = menu_entries()
+        relist(entries)
+        if not entries:
+            if scanning:
+                txt = font_small.render("Waiting for Dev Mode consoles to answer on port 11443...", True, UI_COLORS["muted"])
+            else:
+                txt = font_small.render("No consoles found yet. Confirm Dev Mode is enabled and the kit is on the same LAN.", True, UI_COLORS["danger"])
             screen.blit(txt, (list_rect.x + 20, list_rect.y + 56))
         else:
-            if not consoles:
-                txt = font_small.render("No consoles found yet. Confirm Dev Mode is enabled and the kit is on the same LAN.", True, UI_COLORS["danger"])
-                screen.blit(txt, (list_rect.x + 20, list_rect.y + 56))
-            else:
-                txt = font_small.render("Select a console to open the live control room.", True, UI_COLORS["muted"])
-                screen.blit(txt, (list_rect.x + 20, list_rect.y + 56))
-                for i, (ip, name) in enumerate(consoles):
-                    btn = Button(list_rect.x + 20, list_rect.y + 94 + i*64, list_rect.width - 40, 52,
-                                 f"{name}   ({ip})", (39, 139, 101), (58, 170, 122))
-                    btn.draw(screen)
+            txt = font_small.render("Select a console to open the live control room.", True, UI_COLORS["muted"])
+            screen.blit(txt, (list_rect.x + 20, list_rect.y + 56))
+            for i, entry in enumerate(entries):
+                entry_button(i, *entry).draw(screen)
 
         refresh_btn.draw(screen)
+        wall_btn.enabled = len(entries) >= 2
+        wall_btn.draw(screen)
 
         for event in pygame.event.get():
-            if event.type == pygame.QUIT: return None
+            if event.type == pygame.QUIT:
+                relist([])
+                return None
             if event.type == pygame.VIDEORESIZE:
                 screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                if not scanning:
-                    if refresh_btn.clicked(pygame.mouse.get_pos()):
-                        scanning = True; consoles.clear()
-                        threading.Thread(target=scan_network_async, args=(consoles, done), daemon=True).start()
-                    else:
-                        for i, (ip, name) in enumerate(consoles):
-                            btn = Button(list_rect.x + 20, list_rect.y + 94 + i*64, list_rect.width - 40, 52,
-                                         f"{name}   ({ip})", (39, 139, 101), (58, 170, 122))
-                            if btn.clicked(pygame.mouse.get_pos()): return ip
+                if not scanning and refresh_btn.clicked(pygame.mouse.get_pos()):
+                    scanning = True
+                    consoles.clear()
+                    cached = load_discovery_cache()
+                    start_scan()
+                elif wall_btn.enabled and wall_btn.clicked(pygame.mouse.get_pos()):
+                    relist([])
+                    return menu_entries()  # video wall of every listed console
+                else:
+                    for i, entry in enumerate(menu_entries()):
+                        if entry_button(i, *entry).clicked(pygame.mouse.get_pos()):
+                            relist([], keep=(entry[0],))
+                            return entry[0]
 
         pygame.display.flip()
         clock.tick(30)
@@ -4033,12 +6307,32 @@ def run_stream(screen, clock, ip):
     pygame.display.set_caption(f"Xbox Devkit • {ip} • Live + Full Shell")
 
     input_client = XboxInputClient(ip)
+    devkit_monitor.track(ip)
 
     video = FastVideoStream(ip)
     if video.grabbed:
-        mode = "RTSP"; video.start()
+        mode = "RTSP"
+        video.start()
+        reason = "RTSP answered"
     else:
-        video.stop(); mode = "IMG"; video = IMGVideoStream(ip).start()
+        video.stop()
+        mode = "IMG"
+        video = IMGVideoStream(ip).start()
+        reason = "RTSP unavailable"
+    video.replay = ReplayBuffer(ip)
+    video.stats = VideoStats(os.environ.get(VIDEO_STATS_ENV))
+    video.mjpeg = MjpegServer()
+    bus_name = os.environ.get(FRAME_BUS_ENV, "").strip()
+    if bus_name:
+        video.bus = FrameBus(f"xbax-{ip.replace('.', '-')}" if bus_name == "1" else bus_name)
+    show_hud = False
+    hud_surf, hud_at = None, 0.0
+    shown_key = None
+    drawn_layout = drawn_video = drawn_header = header_cache = None
+    drawn_buttons = {}
+    overlay_shown = False
+    repaint = True
+    transport = TransportSelector(ip, video, mode, reason)
 
     # Buttons auto-size their width from text at construction
     shell_btn     = Button(0, 18, 0, 46, "Connect Dev Shell",    (39, 119, 184), (58, 149, 220))
@@ -4048,9 +6342,23 @@ def run_stream(screen, clock, ip):
     deploy_btn    = Button(0, 18, 0, 46, "Deploy",               (166, 73, 81),  (198, 92, 102))
     bs_btn        = Button(0, 18, 0, 46, "Start BS",             (168, 111, 42), (204, 139, 57))
     full_term_btn = Button(0, 18, 0, 46, "Toggle Full Terminal", (57, 70, 89),   (80, 95, 116))
+    header_buttons = (shell_btn, install_btn, pipeline_btn, package_btn, deploy_btn, bs_btn, full_term_btn)
+
+    def button_key(button):
+        return (button.text, button.enabled, tuple(button.rect), button.rect.collidepoint(pygame.mouse.get_pos()))
 
     terminal_height = DEFAULT_TERMINAL_HEIGHT
     terminal = IntegratedTerminal(0, STREAM_SIZE[1] - terminal_height, STREAM_SIZE[0], terminal_height)
+    terminal.replay = video.replay
+    terminal.mjpeg = video.mjpeg
+    terminal.input = input_client
+    if os.environ.get(MJPEG_PORT_ENV, "").strip(): terminal.share_video(os.environ[MJPEG_PORT_ENV].strip())
+    def input_state(state, detail):
+        text = {"connected": "[+] Remote input connected", "reconnecting": "[-] Remote input lost"}.get(state)
+        if text: terminal.log(f"{text}{' (' + detail + ')' if detail else ''}")
+    input_client.on_state = input_state
+    if video.stats.log_error: terminal.log(f"[-] Video stats log disabled: {video.stats.log_error}")
+    if video.bus: terminal.log(f"[+] Publishing frames to shared memory '{video.bus.name}' ({video.bus.slots} slots)")
 
     vid_rect = (0, HEADER_HEIGHT, STREAM_SIZE[0], STREAM_SIZE[1] - terminal_height - HEADER_HEIGHT)
     target_size = (vid_rect[2], vid_rect[3])
@@ -4074,6 +6382,7 @@ def run_stream(screen, clock, ip):
     reboot_sub_f    = ui_font(17)
     header_font     = ui_font(30, bold=True)
     subheader_font  = ui_font(16)
+    hud_font        = ui_font(14, monospace=True)
 
     def layout_header_buttons():
         primary = [shell_btn, install_btn, pipeline_btn]
@@ -4103,6 +6412,7 @@ def run_stream(screen, clock, ip):
             target_size = (0, 0)
             separator_rect = pygame.Rect(0, 0, 0, 0)
             active_vid_rect = vid_rect
+            video.set_target(target_size)
             return
 
         available_height = max(HEADER_HEIGHT + MIN_VIDEO_HEIGHT + MIN_TERMINAL_HEIGHT + SPLITTER_HEIGHT, STREAM_SIZE[1]) - HEADER_HEIGHT
@@ -4114,6 +6424,7 @@ def run_stream(screen, clock, ip):
         vid_rect = (0, HEADER_HEIGHT, STREAM_SIZE[0], max(1, separator_rect.top - HEADER_HEIGHT))
         target_size = (max(1, vid_rect[2]), max(1, vid_rect[3]))
         active_vid_rect = vid_rect
+        video.set_target(target_size)
 
     while running:
         cur_size = screen.get_size()
@@ -4128,7 +6439,7 @@ def run_stream(screen, clock, ip):
 
             terminal._mark_dirty()
             force_resize = False
-            screen.fill((0, 0, 0))
+            repaint = True
 
         if terminal.needs_pin_prompt:
             prompting_pin = True; pin_buffer = ""
@@ -4142,67 +6453,116 @@ def run_stream(screen, clock, ip):
         bs_btn.enabled = terminal.can_toggle_bs()
         bs_btn.text = "Stop BS" if terminal.is_bs_running() else "Start BS"
 
-        screen.blit(backdrop, (0, 0))
+        # ── Compose ──────────────────────────────────────────────────────
+        # Only regions whose content changed are repainted and pushed with
+        # display.update(rects); layout changes and modal overlays repaint all.
+        overlay = prompting_pin or terminal.needs_reboot_prompt
+        layout_key = (STREAM_SIZE, vid_rect, tuple(terminal.rect), tuple(separator_rect), terminal.fullscreen_mode, dragging_separator)
+        full = repaint or overlay or overlay_shown or layout_key != drawn_layout
+        overlay_shown, drawn_layout, repaint = overlay, layout_key, False
+        dirty = []
+        if full: screen.blit(backdrop, (0, 0))
 
         # ── Video ────────────────────────────────────────────────────────
+        if transport.tick():
+            video, mode = transport.video, transport.mode
+            video.set_target(target_size)
+            pygame.display.set_caption(f"Xbox Devkit • {ip} • {mode} mode")
         if not terminal.fullscreen_mode:
-            ret, data = video.read()
-            frame_surf = None
-            if ret and data is not None:
-                if mode == "RTSP":
-                    h, w = data.shape[:2]
-                    scale = min(target_size[0]/max(1,w), target_size[1]/max(1,h))
-                    nw, nh = max(1,int(w*scale)), max(1,int(h*scale))
-                    frame = cv2.resize(data, (nw,nh), interpolation=cv2.INTER_LINEAR)
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    frame_surf = pygame.surfarray.make_surface(np.transpose(frame,(1,0,2)))
-                else:
-                    w, h = data.get_width(), data.get_height()
-                    scale = min(target_size[0]/max(1,w), target_size[1]/max(1,h))
-                    nw, nh = max(1,int(w*scale)), max(1,int(h*scale))
-                    frame_surf = pygame.transform.scale(data, (nw,nh))
-
+            seq, frame_time, frame_surf = video.display()
+            if show_hud and time.monotonic() - hud_at > 0.25:  # re-render text at 4 Hz, not every tick
+                hud_lines = video.stats.lines(mode) + input_client.lines()
+                hud_surf = pygame.Surface((max(hud_font.size(l)[0] for l in hud_lines) + 20, len(hud_lines) * 18 + 14), pygame.SRCALPHA)
+                hud_surf.fill((0, 0, 0, 170))
+                for i, line in enumerate(hud_lines):
+                    hud_surf.blit(hud_font.render(line, True, UI_COLORS["text"]), (10, 7 + i * 18))
+                hud_at = time.monotonic()
+            video_key = (video, seq, frame_surf is not None, show_hud, hud_at)
+            if full or video_key != drawn_video:
+                drawn_video = video_key
+                if not full: screen.blit(backdrop, vid_rect, vid_rect)
                 if frame_surf:
+                    nw, nh = frame_surf.get_size()
                     ox = vid_rect[0] + (target_size[0]-nw)//2
                     oy = vid_rect[1] + (target_size[1]-nh)//2
                     active_vid_rect = (ox,oy,nw,nh)
                     pygame.draw.rect(screen, UI_COLORS["terminal_bg"], vid_rect, border_radius=18)
+                    blit_t0 = time.perf_counter()
                     screen.blit(frame_surf, (ox,oy))
+                    blit_s = time.perf_counter() - blit_t0
                     pygame.draw.rect(screen, UI_COLORS["panel_border"], vid_rect, width=1, border_radius=18)
+                    if (video, seq) != shown_key:
+                        shown_key = (video, seq)
+                        video.stats.on_presented(video, mode, seq, frame_time, blit_s)
+                if show_hud and hud_surf:
+                    screen.blit(hud_surf, (vid_rect[0] + 12, vid_rect[1] + 12))
+                dirty.append(pygame.Rect(vid_rect))
 
         # ── Header ───────────────────────────────────────────────────────
-        header_rect = pygame.Rect(14, 14, STREAM_SIZE[0] - 28, HEADER_HEIGHT - 22)
-        draw_panel(screen, header_rect, UI_COLORS["panel"], UI_COLORS["panel_border"], radius=22)
-        screen.blit(header_font.render("Xbox Devkit Control Room", True, UI_COLORS["text"]), (28, 24))
-        screen.blit(subheader_font.render(f"{ip} • {mode} video transport • D:/DevelopmentFiles/Sandbox/Xbax", True, UI_COLORS["muted"]), (30, 59))
-
-        chip_x = 28
-        chip_y = 116
-        for label, color in (
+        video_state = video.status()
+        video_chip = {
+            "connected":    ("Video Live",         UI_COLORS["success"]),
+            "connecting":   ("Video Connecting",   UI_COLORS["accent"]),
+            "stalled":      ("Video Stalled",      UI_COLORS["warning"]),
+            "reconnecting": (f"Video Reconnecting #{getattr(video, 'reconnects', 0) + 1}", UI_COLORS["danger"]),
+        }[video_state]
+        input_chip = {
+            "connecting":   ("Input Connecting",   UI_COLORS["accent"]),
+            "connected":    ("Input Live",         UI_COLORS["success"]),
+            "reconnecting": (f"Input Reconnecting #{input_client.reconnects + 1}", UI_COLORS["danger"]),
+        }[input_client.state]
+        chips = (
+            video_chip,
+            input_chip,
             ("Dev Shell Ready" if terminal.has_active_ssh() else "Dev Shell Offline", UI_COLORS["success"] if terminal.has_active_ssh() else UI_COLORS["danger"]),
             ("Relay Running" if terminal.is_bs_running() else "Relay Idle", UI_COLORS["accent"] if terminal.is_bs_running() else UI_COLORS["warning"]),
-            terminal.appx_signing_summary(),
+            tuple(terminal.appx_signing_summary()),
             ("TriangleCpp Ready" if os.path.isfile(TRIANGLE_CPP_OUTPUT) else "TriangleCpp Pending", UI_COLORS["success"] if os.path.isfile(TRIANGLE_CPP_OUTPUT) else UI_COLORS["panel_border"]),
-        ):
-            chip_rect = draw_status_chip(screen, chip_x, chip_y, label, color)
-            chip_x = chip_rect.right + 10
-
-        shell_btn.draw(screen)
-        install_btn.draw(screen)
-        pipeline_btn.draw(screen)
-        package_btn.draw(screen)
-        deploy_btn.draw(screen)
-        bs_btn.draw(screen)
-        full_term_btn.draw(screen)
-
-        if not terminal.fullscreen_mode:
+        )
+        header_key = (STREAM_SIZE, mode, transport.reason, chips)
+        if full or header_key != drawn_header:
+            # Panel, title and chips are cached; buttons are composited on top
+            drawn_header = header_key
+            header_cache = pygame.Surface((STREAM_SIZE[0], HEADER_HEIGHT))
+            header_cache.blit(backdrop, (0, 0))
+            header_rect = pygame.Rect(14, 14, STREAM_SIZE[0] - 28, HEADER_HEIGHT - 22)
+            draw_panel(header_cache, header_rect, UI_COLORS["panel"], UI_COLORS["panel_border"], radius=22)
+            header_cache.blit(header_font.render("Xbox Devkit Control Room", True, UI_COLORS["text"]), (28, 24))
+            header_cache.blit(subheader_font.render(f"{ip} • {mode} video transport ({transport.reason}) • D:/DevelopmentFiles/Sandbox/Xbax", True, UI_COLORS["muted"]), (30, 59))
+            chip_x = 28
+            chip_y = 116
+            for label, color in chips:
+                chip_rect = draw_status_chip(header_cache, chip_x, chip_y, label, color)
+                chip_x = chip_rect.right + 10
+            screen.blit(header_cache, (0, 0))
+            for button in header_buttons: button.draw(screen)
+            drawn_buttons = {button: button_key(button) for button in header_buttons}
+            dirty.append(header_cache.get_rect())
+        else:
+            # Hover/enable changes repaint just that button (and any shadow it overlaps)
+            for button in header_buttons:
+                key = button_key(button)
+                if key == drawn_buttons.get(button): continue
+                drawn_buttons[button] = key
+                region = button.rect.union(button.rect.move(0, 5))
+                screen.set_clip(region)
+                screen.blit(header_cache, region, region)
+                for other in header_buttons:
+                    if other.rect.union(other.rect.move(0, 5)).colliderect(region): other.draw(screen)
+                screen.set_clip(None)
+                dirty.append(region)
+
+        if full and not terminal.fullscreen_mode:
             sep_color = (0, 170, 215) if dragging_separator else (55, 75, 95)
             pygame.draw.rect(screen, sep_color, separator_rect)
             handle = pygame.Rect(0, 0, 120, 4)
             handle.center = separator_rect.center
             pygame.draw.rect(screen, (190, 210, 225), handle, border_radius=3)
 
-        terminal.draw(screen)
+        if full or terminal.needs_redraw():
+            if not full: screen.blit(backdrop, terminal.rect, terminal.rect)
+            terminal.draw(screen)
+            dirty.append(terminal.rect.copy())
 
         # ── PIN overlay ──────────────────────────────────────────────────
         if prompting_pin:
@@ -4227,7 +6587,8 @@ def run_stream(screen, clock, ip):
             screen.blit(reboot_sub_f.render("ENTER  —  Reboot console remotely",True,(255,255,255)),(ox+20,oy+112))
             screen.blit(reboot_sub_f.render("ESC    —  Dismiss",True,(130,130,130)),(ox+20,oy+155))
 
-        pygame.display.flip()
+        if full: pygame.display.flip()
+        elif dirty: pygame.display.update(dirty)
 
         # ── Events ───────────────────────────────────────────────────────
         for event in pygame.event.get():
@@ -4237,6 +6598,9 @@ def run_stream(screen, clock, ip):
                 screen = pygame.display.set_mode((event.w,event.h), pygame.RESIZABLE)
                 force_resize = True
 
+            elif event.type in (pygame.VIDEOEXPOSE, getattr(pygame, "WINDOWEXPOSED", pygame.VIDEOEXPOSE)):
+                repaint = True  # uncovered window areas need every region redrawn
+
             elif event.type == pygame.DROPFILE:
                 if terminal.connected:
                     threading.Thread(target=terminal.upload_file, args=(event.file,), daemon=True).start()
@@ -4255,7 +6619,7 @@ def run_stream(screen, clock, ip):
                         terminal.retry_count = 0
                         def do_reboot(tgt):
                             try:
-                                requests.post(f"https://{tgt}:11443/ext/power?action=reboot", verify=False, timeout=3)
+                                devkit_http.post(tgt, "/ext/power?action=reboot", timeout=3)
                                 terminal.log("[+] Reboot command sent! Waiting for console to restart...")
                             except Exception as ex:
                                 terminal.log(f"[-] Reboot failed: {ex}")
@@ -4284,11 +6648,18 @@ def run_stream(screen, clock, ip):
                 continue
 
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_F8:
-                video.stop(); force_resize = True
-                if mode == "RTSP": mode="IMG"; video=IMGVideoStream(ip).start()
-                else:             mode="RTSP"; video=FastVideoStream(ip).start()
+                transport.manual()
+                force_resize = True
+                video, mode = transport.video, transport.mode
                 pygame.display.set_caption(f"Xbox Devkit • {ip} • {mode} mode")
 
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+                terminal.save_replay()
+
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F10:
+                show_hud = not show_hud
+                hud_at = 0.0
+
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mx,my = pygame.mouse.get_pos()
                 if event.button == 1 and not terminal.fullscreen_mode and separator_rect.collidepoint(mx, my):
@@ -4415,8 +6786,136 @@ def run_stream(screen, clock, ip):
 
         clock.tick(FPS if mode=="RTSP" else 30)
 
-    video.stop()
+    transport.stop()
+    if terminal.input_player: terminal.input_player.stop()
+    input_client.stop()
+    video.stats.close()
+    if video.bus: video.bus.close()
+    if video.replay: video.replay.close()
+    video.mjpeg.stop()
     terminal.close()
+    devkit_monitor.forget(ip)
+
+# ================== VIDEO WALL ==================
+def _open_wall_stream(ip):
+    video = FastVideoStream(ip)
+    if video.grabbed: return video, "RTSP"
+    video.stop()
+    return IMGVideoStream(ip), "IMG"
+
+def run_wall(screen, clock, consoles):
+    """Tiled live view of several devkits. Each tile has its own stream, and decode stays on
+    that stream's thread (FFmpeg decodes inside grab()); only scaling to the tile runs on a
+    shared pool. Unfocused tiles convert only WALL_UNFOCUSED_FPS frames per second. Click focuses a tile, Tab cycles, Enter or double-click opens the focused console
+    in the full control room (its ip is returned), Esc closes the wall."""
+    global STREAM_SIZE
+    pygame.display.set_caption(f"Xbox Devkit • Video Wall • {len(consoles)} consoles")
+    title_font = ui_font(24, bold=True)
+    label_font = ui_font(15, bold=True)
+    hint_font = ui_font(15)
+    scale_pool = concurrent.futures.ThreadPoolExecutor(WALL_SCALE_WORKERS, thread_name_prefix="xbax-wall-scale")
+    tiles = [{"ip": ip, "name": name, "video": None, "mode": "", "rect": pygame.Rect(0, 0, 0, 0)} for ip, name in consoles]
+    focus = 0
+    stopped = False
+
+    def tile_target(tile):
+        return (max(1, tile["rect"].w - 16), max(1, tile["rect"].h - WALL_LABEL_HEIGHT - 12))
+
+    def connect(tile):
+        video, mode = _open_wall_stream(tile["ip"])
+        video.scale_pool = scale_pool
+        video.set_target(tile_target(tile))
+        if stopped:
+            video.stop()
+            return
+        tile["mode"] = mode
+        tile["video"] = video.start()
+        apply_focus()
+
+    def apply_focus():
+        for i, tile in enumerate(tiles):
+            if tile["video"]: tile["video"].frame_interval = 0.0 if i == focus else 1.0 / WALL_UNFOCUSED_FPS
+
+    def layout():
+        cols = max(1, int(math.ceil(math.sqrt(len(tiles)))))
+        rows = max(1, int(math.ceil(len(tiles) / cols)))
+        top, gap = 64, 10
+        w = (STREAM_SIZE[0] - gap * (cols + 1)) // cols
+        h = (STREAM_SIZE[1] - top - gap * (rows + 1)) // rows
+        for i, tile in enumerate(tiles):
+            r, c = divmod(i, cols)
+            tile["rect"] = pygame.Rect(gap + c * (w + gap), top + gap + r * (h + gap), max(1, w), max(1, h))
+            if tile["video"]: tile["video"].set_target(tile_target(tile))
+
+    for tile in tiles:
+        threading.Thread(target=connect, args=(tile,), daemon=True).start()
+
+    backdrop = None
+    last_click = (None, 0.0)
+    result = None
+    running = True
+    while running:
+        cur_size = screen.get_size()
+        if cur_size != STREAM_SIZE or backdrop is None:
+            STREAM_SIZE = cur_size
+            backdrop = build_backdrop(STREAM_SIZE)
+            layout()
+
+        screen.blit(backdrop, (0, 0))
+        screen.blit(title_font.render("Video Wall", True, UI_COLORS["text"]), (18, 16))
+        screen.blit(hint_font.render("Click to focus  •  Tab next  •  Enter / double-click opens the control room  •  Esc closes",
+                                     True, UI_COLORS["muted"]), (170, 24))
+
+        for i, tile in enumerate(tiles):
+            rect, video = tile["rect"], tile["video"]
+            draw_panel(screen, rect, UI_COLORS["panel"], UI_COLORS["accent"] if i == focus else UI_COLORS["panel_border"], radius=14)
+            if video:
+                _, _, surf = video.display()
+                if surf:
+                    area = pygame.Rect(rect.x + 8, rect.y + WALL_LABEL_HEIGHT + 4, *tile_target(tile))
+                    screen.blit(surf, surf.get_rect(center=area.center))
+                state = video.status()
+                m = video.metrics()
+                info = f"{tile['mode']} {m['fps']:.0f} fps" if state == "connected" else f"{tile['mode']} {state}"
+            else:
+                state, info = "connecting", "connecting"
+            color = UI_COLORS["success"] if state == "connected" else UI_COLORS["warning"]
+            screen.blit(label_font.render(f"{tile['name']}  ({tile['ip']})", True, UI_COLORS["text"]), (rect.x + 12, rect.y + 8))
+            info_surf = label_font.render(info, True, color)
+            screen.blit(info_surf, (rect.right - info_surf.get_width() - 12, rect.y + 8))
+
+        pygame.display.flip()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT: running = False
+            elif event.type == pygame.VIDEORESIZE:
+                screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE: running = False
+                elif event.key == pygame.K_TAB:
+                    focus = (focus + 1) % len(tiles)
+                    apply_focus()
+                elif event.key in (pygame.K_RETURN, pygame.K_KP_ENTER):
+                    result = tiles[focus]["ip"]
+                    running = False
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                for i, tile in enumerate(tiles):
+                    if not tile["rect"].collidepoint(event.pos): continue
+                    now = time.monotonic()
+                    if last_click[0] == i and now - last_click[1] < 0.4:
+                        result = tile["ip"]
+                        running = False
+                    last_click = (i, now)
+                    focus = i
+                    apply_focus()
+
+        clock.tick(FPS)
+
+    stopped = True
+    for tile in tiles:
+        if tile["video"]: tile["video"].stop()
+    scale_pool.shutdown(wait=False, cancel_futures=True)
+    return result
 
 # ================== MAIN ==================
 # ================== CLI ==================
@@ -4431,7 +6930,26 @@ def run_stream(screen, clock, ip):
 CLI_USAGE = r"""\
 Usage:
   main.py                           # launch the GUI (default)
-  main.py scan [--timeout S]        # scan the LAN and print discovered devkits
+  main.py scan [--timeout S] [--cached] [--cidr A.B.C.D/N ...] [--expect N]
+                                    # probe cached devkits and ARP neighbors first, then sweep every local
+                                    # interface's subnet (or the given --cidr ranges; repeatable or comma
+                                    # separated); prints each devkit as it is confirmed and stops after N
+                                    # with --expect. --cached prints the cache without probing.
+  main.py capture <ip> [--fps N] [--duration S] [--out DIR] [--format png|jpg|npy]
+                      [--transport auto|rtsp|img] [--workers N]
+                                    # record the live stream headlessly (RTSP, falling back to IMG) through a
+                                    # bounded writer pool: one image per frame, or a single memory-mapped
+                                    # frames.npy. Writes index.json with per-frame seq/timestamps and the
+                                    # stream frames skipped between polls (reported as dropped).
+  main.py inputplay <ip> <log> [--speed X] [--repeat N]
+                                    # replay an input log recorded with the terminal's `inputrec` command
+                                    # against <ip>'s remote input, scheduled on a dedicated thread;
+                                    # prints send-lateness percentiles.
+  main.py latency <ip> [--trials N] [--key NAME] [--roi X,Y,W,H] [--threshold T]
+                      [--transport auto|rtsp|img] [--out FILE.csv]
+                                    # input-to-photon latency: press NAME (pygame key name, default space),
+                                    # detect the change in the ROI (fractions of the frame) and print
+                                    # p50/p95/p99 for queue, send, console+network, decode and total.
   main.py creds <ip>                # fetch DevToolsUser credentials from <ip>
     main.py dump <ip> <remote> [local]
                                                                         # SFTP-download a remote file or directory
@@ -4453,6 +6971,7 @@ Usage:
   main.py install <ip>              # build the Xbax package and sync it to <ip>
   main.py trianglecpp <ip>          # install tools, start the relay, build TriangleCpp, package bin.appx, then upload/deploy it
   main.py reboot <ip>               # POST a reboot to <ip>:11443
+  main.py wall <ip> [<ip> ...]      # open the tiled live video wall for several devkits (needs a display)
   main.py -h | --help               # show this message
 """
 
@@ -4468,6 +6987,7 @@ class HeadlessTerminal(IntegratedTerminal):
         self.cols = 140
         self.rows = 40
         self.grid = [[' ' for _ in range(self.cols)] for _ in range(self.rows)]
+        self._reset_vt_parser()
 
         self.cx = 0
         self.cy = 0
@@ -4489,6 +7009,10 @@ class HeadlessTerminal(IntegratedTerminal):
         self.retry_count = 0
         self.ip = None
         self.pin = None
+        self.replay = None
+        self.mjpeg = None
+        self.input = None
+        self.input_player = None
         self.installing = False
         self.package_busy = False
         self.bs_running = False
@@ -4535,8 +7059,20 @@ def _cli_connect_ssh(ip, timeout=12):
     ssh.get_transport().set_keepalive(SSH_KEEPALIVE_INTERVAL)
     return ssh, (user or "DevToolsUser")
 
+def _print_scan_entry(entry):
+    if isinstance(entry, tuple) and len(entry) >= 2:
+        ip, hostname = entry[0], entry[1]
+        print(f"{ip:<16} {hostname}", flush=True)
+    elif isinstance(entry, dict):
+        print(f"{entry.get('ip','?'):<16} {entry.get('hostname','')}", flush=True)
+    else:
+        print(entry, flush=True)
+
 def _cli_scan(args):
     timeout = 6.0
+    cached_only = False
+    cidrs = []
+    expected = None
     i = 0
     while i < len(args):
         if args[i] in ("--timeout", "-t") and i + 1 < len(args):
@@ -4546,33 +7082,271 @@ def _cli_scan(args):
                 print(f"invalid timeout: {args[i + 1]}", file=sys.stderr)
                 return 2
             i += 2
+        elif args[i] == "--cached":
+            cached_only = True
+            i += 1
+        elif args[i] == "--cidr" and i + 1 < len(args):
+            cidrs.append(args[i + 1])
+            i += 2
+        elif args[i] == "--expect" and i + 1 < len(args):
+            try:
+                expected = int(args[i + 1])
+                if expected <= 0:
+                    raise ValueError
+            except ValueError:
+                print(f"invalid --expect (want a positive count): {args[i + 1]}", file=sys.stderr)
+                return 2
+            i += 2
         else:
             print(f"unknown argument: {args[i]}", file=sys.stderr)
             return 2
 
-    consoles = []
-    done = threading.Event()
-    threading.Thread(
-        target=scan_network_async,
-        args=(consoles, done.set),
-        daemon=True,
-    ).start()
-    if not done.wait(timeout=timeout):
-        print(f"scan still running after {timeout}s; printing partial results", file=sys.stderr)
+    if cached_only:
+        cached = load_discovery_cache()
+        if not cached:
+            print("no cached devkits", file=sys.stderr)
+            return 1
+        for entry in cached:
+            _print_scan_entry(entry)
+        return 0
 
+    try:
+        networks = parse_scan_cidrs(cidrs) if cidrs else None
+    except ValueError as exc:
+        print(f"invalid --cidr: {exc}", file=sys.stderr)
+        return 2
+
+    # Devkits are printed as soon as they are confirmed: cached consoles
+    # usually show up within a few hundred ms, new ones when the sweep
+    # reaches them.
+    # A devkit whose name is still resolving is printed when the name
+    # arrives, or with a placeholder if the scan ends first.
+    consoles = {}
+    printed = set()
+
+    async def consume():
+        async for ip, hostname in discover_devkits(networks, expected=expected):
+            consoles[ip] = hostname or consoles.get(ip)
+            if hostname and ip not in printed:
+                printed.add(ip)
+                _print_scan_entry((ip, hostname))
+
+    try:
+        asyncio.run(asyncio.wait_for(consume(), timeout))
+    except asyncio.TimeoutError:
+        print(f"scan still running after {timeout}s; stopping with partial results", file=sys.stderr)
+
+    for ip, hostname in consoles.items():
+        if ip not in printed:
+            _print_scan_entry((ip, hostname or "Xbox Devkit"))
     if not consoles:
         print("no devkits discovered", file=sys.stderr)
         return 1
-    for entry in consoles:
-        if isinstance(entry, tuple) and len(entry) >= 2:
-            ip, hostname = entry[0], entry[1]
-            print(f"{ip:<16} {hostname}")
-        elif isinstance(entry, dict):
-            print(f"{entry.get('ip','?'):<16} {entry.get('hostname','')}")
-        else:
-            print(entry)
     return 0
 
+def _cli_open_stream(ip, transport):
+    """Started (stream, mode) for the headless commands; RTSP first unless transport == 'img'."""
+    stream = None
+    if transport in ("auto", "rtsp"):
+        stream = FastVideoStream(ip)
+        if not stream.grabbed:
+            stream.stop()
+            stream = None
+            if transport == "rtsp":
+                print(f"[-] RTSP stream on {ip}:11442 did not answer", file=sys.stderr)
+                return None, None
+    mode = "RTSP" if stream else "IMG"
+    return (stream or IMGVideoStream(ip, bgr=True)).start(), mode
+
+def _cli_capture(args):
+    if not args or args[0].startswith("-"):
+        print("usage: main.py capture <ip> [--fps N] [--duration S] [--out DIR] [--format png|jpg|npy] "
+              "[--transport auto|rtsp|img] [--workers N]", file=sys.stderr)
+        return 2
+    ip = args[0]
+    fps, duration, out_dir, fmt, transport, workers = 30.0, 10.0, None, "png", "auto", 4
+    i = 1
+    while i < len(args):
+        a = args[i]
+        if i + 1 >= len(args):
+            print(f"unknown argument: {a}", file=sys.stderr)
+            return 2
+        v = args[i + 1]
+        try:
+            if a == "--fps": fps = float(v)
+            elif a == "--duration": duration = float(v)
+            elif a == "--workers": workers = int(v)
+            elif a == "--out": out_dir = v
+            elif a == "--format" and v.lower() in FrameWriter.FORMATS: fmt = v.lower()
+            elif a == "--transport" and v.lower() in ("auto", "rtsp", "img"): transport = v.lower()
+            else:
+                print(f"unknown argument: {a} {v}", file=sys.stderr)
+                return 2
+        except ValueError:
+            print(f"invalid {a}: {v}", file=sys.stderr)
+            return 2
+        i += 2
+    if fps <= 0 or duration <= 0 or workers <= 0:
+        print("--fps, --duration and --workers must be positive", file=sys.stderr)
+        return 2
+    out_dir = os.path.abspath(out_dir or f"capture-{ip}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+
+    stream, mode = _cli_open_stream(ip, transport)
+    if stream is None: return 1
+
+    writer = FrameWriter(out_dir, fmt, workers, capacity=int(math.ceil(fps * duration)) + 1)
+    print(f"[*] Capturing {ip} over {mode} at up to {fps:g} fps for {duration:g} s -> {out_dir}")
+    interval = 1.0 / fps
+    start = next_at = time.monotonic()
+    last_seq, idle_ticks = None, 0
+    try:
+        while time.monotonic() - start < duration:
+            seq, ts, frame = stream.latest()
+            if frame is not None and seq != last_seq:
+                if writer.full():  # catch-up ticks after a stall can outrun the sized run
+                    print(f"[*] frames.npy is full ({writer.capacity} frames), stopping early")
+                    break
+                # latest() only exposes the newest frame; anything published since the last poll is lost
+                writer.submit(frame, seq, ts - start, seq - last_seq - 1 if last_seq is not None else 0)
+                last_seq = seq
+            else:
+                idle_ticks += 1
+            next_at = max(next_at + interval, time.monotonic() - interval)
+            time.sleep(max(0.0, next_at - time.monotonic()))
+    except KeyboardInterrupt:
+        print("[*] Interrupted, flushing frames...")
+    finally:
+        elapsed = time.monotonic() - start
+        stream.stop()
+        count = writer.close()
+    print(f"[+] Wrote {count} frames in {elapsed:.1f} s ({count / max(elapsed, 1e-6):.1f} fps), "
+          f"{writer.dropped} stream frames dropped between polls, {idle_ticks} ticks without a new frame, "
+          f"{len(writer.errors)} errors")
+    return 0 if count and not writer.errors else 1
+
+def _cli_latency(args):
+    if not args or args[0].startswith("-"):
+        print("usage: main.py latency <ip> [--trials N] [--key NAME] [--roi X,Y,W,H] [--threshold T] "
+              "[--transport auto|rtsp|img] [--out FILE.csv]", file=sys.stderr)
+        return 2
+    ip = args[0]
+    trials, key_name, roi, threshold, transport, out_path = 20, "space", (0.0, 0.0, 1.0, 1.0), LATENCY_DIFF_THRESHOLD, "auto", None
+    i = 1
+    while i < len(args):
+        a = args[i]
+        if i + 1 >= len(args):
+            print(f"unknown argument: {a}", file=sys.stderr)
+            return 2
+        v = args[i + 1]
+        try:
+            if a == "--trials": trials = int(v)
+            elif a == "--key": key_name = v
+            elif a == "--threshold": threshold = float(v)
+            elif a == "--out": out_path = v
+            elif a == "--roi":
+                roi = tuple(float(n) for n in v.split(","))
+                if len(roi) != 4 or not all(0.0 <= n <= 1.0 for n in roi) or roi[2] <= 0 or roi[3] <= 0: raise ValueError
+            elif a == "--transport" and v.lower() in ("auto", "rtsp", "img"): transport = v.lower()
+            else:
+                print(f"unknown argument: {a} {v}", file=sys.stderr)
+                return 2
+        except ValueError:
+            print(f"invalid {a}: {v}", file=sys.stderr)
+            return 2
+        i += 2
+    if trials <= 0:
+        print("--trials must be positive", file=sys.stderr)
+        return 2
+    key = getattr(pygame, "K_" + (key_name.lower() if len(key_name) == 1 else key_name.upper()), None)
+    if key is None or XboxInputClient.key_packet(key, True) is None:
+        print(f"invalid --key: {key_name} (letters, digits, space, tab, return, escape, backspace, arrows)", file=sys.stderr)
+        return 2
+
+    client = XboxInputClient(ip, policy="drop")
+    stream, mode = _cli_open_stream(ip, transport)
+    if stream is None:
+        client.stop()
+        return 1
+    stream.stats = VideoStats(None)
+    try:
+        probe = LatencyProbe(client, stream, key, roi, threshold)
+        deadline = time.monotonic() + 10
+        while (not client.connected or stream.frame is None) and time.monotonic() < deadline: time.sleep(0.05)
+        if not client.connected or stream.frame is None:
+            print(f"[-] {'remote input' if not client.connected else mode + ' video'} on {ip} did not come up", file=sys.stderr)
+            return 1
+        noise = probe.calibrate()
+        print(f"[*] {trials} trials pressing {key_name!r} on {ip} over {mode}; "
+              f"idle noise {noise:.2f}, threshold {probe.threshold:.1f}")
+        def report(n, r):
+            print(f"  #{n + 1:<3} " + ("timed out" if r is None else f"{r['total'] * 1000.0:7.1f} ms"))
+        try: probe.run(trials, report)
+        except KeyboardInterrupt: print("[*] Interrupted")
+    except ValueError as exc:
+        print(f"[-] {exc}", file=sys.stderr)
+        return 2
+    finally:
+        stream.stop()
+        client.stop()
+    for line in probe.lines(): print(f"[+] {line}")
+    if out_path and probe.results:
+        with open(out_path, "w", newline="") as f:
+            f.write(",".join(LatencyProbe.SEGMENTS) + "\n")
+            for r in probe.results: f.write(",".join(f"{r[seg] * 1000.0:.3f}" for seg in LatencyProbe.SEGMENTS) + "\n")
+        print(f"[+] Wrote {len(probe.results)} trials to {out_path}")
+    return 0 if probe.results else 1
+
+def _cli_inputplay(args):
+    if len(args) < 2 or args[0].startswith("-") or args[1].startswith("-"):
+        print("usage: main.py inputplay <ip> <log> [--speed X] [--repeat N]", file=sys.stderr)
+        return 2
+    ip, path = args[0], args[1]
+    speed, repeat = 1.0, 1
+    i = 2
+    while i < len(args):
+        a = args[i]
+        if i + 1 >= len(args):
+            print(f"unknown argument: {a}", file=sys.stderr)
+            return 2
+        v = args[i + 1]
+        try:
+            if a == "--speed": speed = float(v)
+            elif a == "--repeat": repeat = int(v)
+            else:
+                print(f"unknown argument: {a} {v}", file=sys.stderr)
+                return 2
+        except ValueError:
+            print(f"invalid {a}: {v}", file=sys.stderr)
+            return 2
+        i += 2
+    if speed <= 0 or repeat <= 0:
+        print("--speed and --repeat must be positive", file=sys.stderr)
+        return 2
+    client = XboxInputClient(ip, policy="drop")
+    try:
+        player = InputPlayer(client, path, speed, repeat)
+    except (OSError, ValueError) as exc:
+        print(f"[-] {exc}", file=sys.stderr)
+        return 1
+    deadline = time.monotonic() + 10
+    while not client.connected and time.monotonic() < deadline: time.sleep(0.05)
+    if not client.connected:
+        print(f"[-] Remote input on {ip}:11443 did not connect", file=sys.stderr)
+        client.stop()
+        return 1
+    span = player.records[-1][0] / speed if player.records else 0.0
+    print(f"[*] Replaying {len(player.records)} packets ({span:.1f} s x {repeat}) from {path} to {ip}")
+    player.start()
+    try:
+        while player.thread.is_alive(): player.thread.join(0.2)
+    except KeyboardInterrupt:
+        print("[*] Interrupted, releasing held inputs...")
+        player.stop()
+        player.thread.join()
+    client.stop()
+    print(f"[{'-' if player.error else '+'}] {player.error + ': ' if player.error else ''}{player.summary()}")
+    return 1 if player.error else 0
+
 def _cli_creds(args):
     if not args:
         print("missing <ip>", file=sys.stderr); return 2
@@ -4821,13 +7595,23 @@ def _cli_install(args):
         try: ssh.close()
         except Exception: pass
 
+def _cli_wall(args):
+    if not args or any(a.startswith("-") for a in args):
+        print("usage: main.py wall <ip> [<ip> ...]", file=sys.stderr)
+        return 2
+    names = {e["ip"]: e.get("hostname") for e in load_discovery_cache()}
+    screen, clock = _init_display("Xbox Devkit • Video Wall")
+    ip = run_wall(screen, clock, [(ip, names.get(ip) or "Xbox Devkit") for ip in args])
+    if ip: run_stream(screen, clock, ip)
+    pygame.quit()
+    return 0
+
 def _cli_reboot(args):
     if not args:
         print("usage: main.py reboot <ip>", file=sys.stderr); return 2
     ip = args[0]
     try:
-        res = requests.post(f"https://{ip}:11443/ext/power?action=reboot",
-                            verify=False, timeout=5)
+        res = devkit_http.post(ip, "/ext/power?action=reboot", timeout=5)
         if res.status_code >= 400:
             print(f"reboot failed: HTTP {res.status_code}", file=sys.stderr); return 1
         print(f"reboot requested for {ip}")
@@ -4861,6 +7645,9 @@ def _cli_trianglecpp(args):
 
 CLI_COMMANDS = {
     "scan":    _cli_scan,
+    "capture": _cli_capture,
+    "inputplay": _cli_inputplay,
+    "latency": _cli_latency,
     "creds":   _cli_creds,
     "dump":    _cli_dump,
     "smbdump": _cli_smbdump,
@@ -4872,6 +7659,7 @@ CLI_COMMANDS = {
     "install": _cli_install,
     "trianglecpp": _cli_trianglecpp,
     "reboot":  _cli_reboot,
+    "wall":    _cli_wall,
 }
 
 def run_cli(argv):
@@ -4885,6 +7673,16 @@ def run_cli(argv):
         return 2
     return handler(argv[1:])
 
+def _init_display(caption):
+    global MENU_SIZE, STREAM_SIZE
+    os.environ['SDL_VIDEO_CENTERED'] = '1'
+    pygame.init()
+    info = pygame.display.Info()
+    screen = pygame.display.set_mode((info.current_w-40, info.current_h-100), pygame.RESIZABLE)
+    pygame.display.set_caption(caption)
+    MENU_SIZE = STREAM_SIZE = screen.get_size()
+    return screen, pygame.time.Clock()
+
 def main():
     # CLI mode: any positional arg → run a headless command and exit.
     # No args → start the pygame GUI as before.
@@ -4894,15 +7692,9 @@ def main():
     ):
         sys.exit(run_cli(sys.argv[1:]))
 
-    os.environ['SDL_VIDEO_CENTERED'] = '1'
-    pygame.init()
-    info = pygame.display.Info()
-    screen = pygame.display.set_mode((info.current_w-40, info.current_h-100), pygame.RESIZABLE)
-    pygame.display.set_caption("Xbox Devkit Launcher")
-    global MENU_SIZE, STREAM_SIZE
-    MENU_SIZE = STREAM_SIZE = screen.get_size()
-    clock = pygame.time.Clock()
+    screen, clock = _init_display("Xbox Devkit Launcher")
     ip = run_menu(screen, clock)
+    if isinstance(ip, list): ip = run_wall(screen, clock, ip)
     if ip: run_stream(screen, clock, ip)
     pygame.quit()
 